@@ -0,0 +1,54 @@
+# analytics.py
+
+import csv
+import json
+import numpy as np
+from metrics import connected_components, order_parameter
+
+# Scalar columns of every time-series row
+SERIES_COLUMNS = ["tick", "clusters", "largest_cluster", "order_parameter", "mean_speed"]
+
+class FlockAnalytics:
+    def __init__(self):
+        """
+        Per-tick flock metrics built from the neighbour pairs the steering pass already
+        found, so no extra distance computations are needed: sub-flocks are the connected
+        components (union-find) of the perception-radius graph.
+        """
+        self.latest = None # Metrics of the last tick, including the sorted cluster sizes
+        self.series = [] # One row of SERIES_COLUMNS per tick
+
+    def update(self, tick, firsts, seconds, velocities):
+        """
+        Records the metrics of one tick.
+        :param firsts: Boid indices of one end of every neighbour pair.
+        :param seconds: Boid indices of the other end.
+        :param velocities: N x 2 velocities after the tick.
+        """
+        labels = connected_components(len(velocities), firsts, seconds)
+        sizes = np.bincount(labels) if len(labels) else np.zeros(0, dtype=int)
+        sizes = np.sort(sizes[sizes > 0])[::-1]
+        speeds = np.hypot(velocities[:, 0], velocities[:, 1])
+        row = {
+            "tick": tick,
+            "clusters": len(sizes),
+            "largest_cluster": int(sizes[0]) if len(sizes) else 0,
+            "order_parameter": order_parameter(velocities),
+            "mean_speed": float(speeds.mean()) if len(speeds) else 0.0,
+        }
+        self.series.append(row)
+        self.latest = dict(row, cluster_sizes=sizes.tolist())
+
+    def clear(self):
+        self.latest = None
+        self.series = []
+
+    def dump(self, path):
+        """Writes the time series as CSV (.csv) or JSON (anything else)."""
+        with open(path, "w", newline="") as f:
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(f, fieldnames=SERIES_COLUMNS)
+                writer.writeheader()
+                writer.writerows(self.series)
+            else:
+                json.dump({"latest": self.latest, "series": self.series}, f)
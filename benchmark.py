@@ -0,0 +1,217 @@
+# benchmark.py
+
+import os
+# Everything is drawn to an offscreen surface, so no display is needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import csv
+import json
+import statistics
+import subprocess
+import sys
+import time
+import pygame
+import params
+import settings # Import settings as a module to access its attributes dynamically
+from main import Game
+from simulation import ENGINES, Simulation
+
+DEFAULT_COUNTS = [50, 200, 1000, 5000]
+SWEPT_RADII = ["PERCEPTION_RADIUS", "SEPARATION_RADIUS"]
+PHASES = ["update", "draw_boids", "ui", "legend", "overlay", "events"]
+STARTUP_PHASES = ["process", "import", "first_ticks"]
+
+# Run in a fresh interpreter by run_startup: imports the headless core, runs a few ticks and reports
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import headless
+imported = time.perf_counter()
+headless.run_headless({ticks}, seed=0, boid_count={count}, engine={engine!r})
+json.dump({{"import": imported - start, "first_ticks": time.perf_counter() - imported,
+           "pygame": "pygame" in sys.modules}}, sys.stdout)
+"""
+
+def _time_phase(func, repeats):
+    """Calls func repeats times and returns the per-call timings in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def _post_events():
+    """Queues a representative frame's worth of input for Game.handle_events."""
+    for i in range(10):
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(400 + i, 300), rel=(1, 0), buttons=(0, 0, 0)))
+
+def radius_values(name):
+    """Returns the min, initial and max of a slider range in PARAM_RANGES."""
+    props = settings.PARAM_RANGES[name]
+    return sorted({props["min"], props["initial"], props["max"]})
+
+def run_case(game, engine, count, radius_name, radius_value, repeats, warmup):
+    """Benchmarks every phase for one boid count and radius setting."""
+    previous = params.current().as_settings()
+    params.publish(**{radius_name: radius_value})
+    try:
+        game.simulation = Simulation(engine, count, seed=0)
+        for _ in range(warmup):
+            game.simulation.update()
+
+        screen = game.screen
+        def draw_boids():
+            screen.fill(settings.BLACK)
+            game.simulation.draw(screen)
+        def handle_events():
+            _post_events()
+            game.handle_events()
+
+        phases = {
+            "update": game.simulation.update,
+            "draw_boids": draw_boids,
+            "ui": lambda: game.ui_manager.draw(screen, game.paused, game.tick_rate),
+            "legend": lambda: game._draw_legend(screen),
+            "overlay": lambda: game.overlay.draw(screen, game._overlay_key(), game._draw_overlay),
+            "events": handle_events,
+        }
+        rows = []
+        for phase in PHASES:
+            timings = _time_phase(phases[phase], repeats)
+            rows.append({
+                "suite": "scaling",
+                "engine": engine,
+                "boids": count,
+                "radius": radius_name,
+                "radius_value": radius_value,
+                "ticks": None,
+                "phase": phase,
+                "mean_ms": statistics.mean(timings),
+                "median_ms": statistics.median(timings),
+                "max_ms": max(timings),
+            })
+        return rows
+    finally:
+        game.simulation.close()
+        params.publish(**previous)
+
+def run_suite(engine, counts, radii, repeats=20, warmup=2):
+    """Sweeps boid counts and radii, returning one result row per case and phase."""
+    game = Game(engine)
+    results = []
+    for count in counts:
+        for radius_name in radii:
+            for radius_value in radius_values(radius_name):
+                results.extend(run_case(game, engine, count, radius_name, radius_value, repeats, warmup))
+                print(f"{engine} boids={count} {radius_name}={radius_value}: done", file=sys.stderr)
+    pygame.quit()
+    return results
+
+def run_startup(engine, count, repeats=10, ticks=10):
+    """
+    Times cold starts: each repeat launches a fresh interpreter that imports the headless
+    core and runs a few ticks, so module imports and one-off initialisation are paid every time.
+    :return: One result row per phase: the whole process, the import and the first ticks.
+    """
+    script = _STARTUP_SCRIPT.format(ticks=ticks, count=count, engine=engine)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)),
+                                                                     os.environ.get("PYTHONPATH")])))
+    timings = {phase: [] for phase in STARTUP_PHASES}
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", script], env=env, check=True, stdout=subprocess.PIPE).stdout
+        timings["process"].append((time.perf_counter() - start) * 1000)
+        child = json.loads(output)
+        timings["import"].append(child["import"] * 1000)
+        timings["first_ticks"].append(child["first_ticks"] * 1000)
+        if child["pygame"] and engine != "boid": # Only the per-object engine needs pygame's Vector2
+            print(f"warning: the headless {engine} engine imported pygame", file=sys.stderr)
+    return [{
+        "suite": "startup",
+        "engine": engine,
+        "boids": count,
+        "radius": None,
+        "radius_value": None,
+        "ticks": ticks,
+        "phase": phase,
+        "mean_ms": statistics.mean(timings[phase]),
+        "median_ms": statistics.median(timings[phase]),
+        "max_ms": max(timings[phase]),
+    } for phase in STARTUP_PHASES]
+
+# Columns of a result row that are numbers, for reading them back from CSV
+NUMERIC_COLUMNS = {"boids": int, "radius_value": float, "ticks": int,
+                   "mean_ms": float, "median_ms": float, "max_ms": float}
+
+def _case_key(row):
+    return (row["suite"], row["engine"], row["boids"], row["radius"], row["radius_value"], row["ticks"], row["phase"])
+
+def compare(results, baseline, tolerance):
+    """
+    Compares median timings against a baseline run.
+    :return: A list of (row, baseline_median) for every case slower than baseline * (1 + tolerance).
+    """
+    reference = {_case_key(row): row["median_ms"] for row in baseline}
+    regressions = []
+    for row in results:
+        base = reference.get(_case_key(row))
+        if base is not None and row["median_ms"] > base * (1 + tolerance):
+            regressions.append((row, base))
+    return regressions
+
+def read_results(path):
+    """Reads results written by write_results, from CSV if path ends in .csv, JSON otherwise."""
+    with open(path, newline="") as f:
+        if not path.endswith(".csv"):
+            return json.load(f)
+        rows = []
+        for row in csv.DictReader(f):
+            # CSV holds every value as text, and None as an empty string
+            rows.append({name: (NUMERIC_COLUMNS.get(name, str)(value) if value != "" else None)
+                         for name, value in row.items()})
+        return rows
+
+def write_results(results, path):
+    """Writes results as CSV if path ends in .csv, JSON otherwise."""
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark simulation, rendering, UI and event handling.")
+    parser.add_argument("--engine", choices=ENGINES, default=settings.SIMULATION_ENGINE)
+    parser.add_argument("--counts", type=int, nargs="+", default=DEFAULT_COUNTS, help="boid counts to sweep")
+    parser.add_argument("--radii", nargs="+", default=SWEPT_RADII, choices=SWEPT_RADII,
+                        help="radius settings to sweep over their slider range")
+    parser.add_argument("--repeats", type=int, default=20, help="timed calls per phase")
+    parser.add_argument("--output", default=None, help="write results to a .json or .csv file")
+    parser.add_argument("--baseline", default=None, help="results of a previous run (.json or .csv) to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before a case counts as a regression")
+    parser.add_argument("--startup", action="store_true",
+                        help="time cold starts of the headless core in fresh interpreters instead")
+    args = parser.parse_args()
+
+    if args.startup:
+        results = [row for count in args.counts for row in run_startup(args.engine, count, args.repeats)]
+    else:
+        results = run_suite(args.engine, args.counts, args.radii, args.repeats)
+    if args.output:
+        write_results(results, args.output)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        regressions = compare(results, read_results(args.baseline), args.tolerance)
+        for row, base in regressions:
+            case = f"{row['radius']}={row['radius_value']}" if row["suite"] == "scaling" else f"startup ticks={row['ticks']}"
+            print(f"REGRESSION {row['engine']} boids={row['boids']} {case} "
+                  f"{row['phase']}: {row['median_ms']:.3f} ms vs baseline {base:.3f} ms", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
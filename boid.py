@@ -1,13 +1,19 @@
 import pygame
 import math
 import random
+import params
 import settings # Import settings as a module to access its attributes dynamically
 
 class Boid:
-    def __init__(self):
-        self.position = pygame.math.Vector2(random.uniform(0, settings.SCREEN_WIDTH), random.uniform(0, settings.SCREEN_HEIGHT))
-        self.velocity = pygame.math.Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize() * settings.MAX_SPEED
+    def __init__(self, p=None):
+        p = p or params.current()
+        self.position = pygame.math.Vector2(random.uniform(0, p.world_width), random.uniform(0, p.world_height))
+        self.velocity = pygame.math.Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize() * p.max_speed
         self.acceleration = pygame.math.Vector2(0, 0)
+        # Forces of the last tick, for the debug overlay (which may be drawn before the first tick)
+        self._cohesion_force = pygame.math.Vector2(0, 0)
+        self._alignment_force = pygame.math.Vector2(0, 0)
+        self._separation_force = pygame.math.Vector2(0, 0)
         self.size = (10, 20) # Default size for boids
         self.color = settings.WHITE # Default color
         # random 0.1 probability
@@ -19,70 +25,109 @@ class Boid:
     def _apply_force(self, force):
         self.acceleration += force
 
-    def _seek(self, target):
-        desired = (target - self.position).normalize() * settings.MAX_SPEED
+    def _seek(self, target, p):
+        desired = (target - self.position).normalize() * p.max_speed
         steer = desired - self.velocity
-        if steer.length() > settings.MAX_FORCE:
-            steer.scale_to_length(settings.MAX_FORCE)
+        if steer.length() > p.max_force:
+            steer.scale_to_length(p.max_force)
         return steer
 
-    def _cohesion(self, boids):
-        center_of_mass = pygame.math.Vector2(0, 0)
+    def _gather(self, boids, p, neighbours=None):
+        """
+        Single pass over boids collecting the sums needed by all three steering rules.
+        Distances are compared squared; a sqrt is only taken inside the separation radius.
+        In topological mode (p.neighbour_count > 0) boids holds exactly the nearest boids:
+        all of them are neighbours, each at its nearest image across the world's edges, unless
+        p.perception_limited also requires them to be inside the perception radius.
+        :param neighbours: Optional list that the boids counted as neighbours are appended to.
+        """
+        px, py = self.position.x, self.position.y
+        perception_sq = p.perception_radius_sq
+        separation_sq = p.separation_radius_sq
+        topological = p.neighbour_count > 0
+        every_neighbour = topological and not p.perception_limited
+        width, height = p.world_width, p.world_height
+
+        center_x = center_y = 0.0
+        velocity_x = velocity_y = 0.0
+        push_x = push_y = 0.0
         count = 0
+        separation_count = 0
         for other in boids:
-            if other != self and self.position.distance_to(other.position) < settings.PERCEPTION_RADIUS:
-                center_of_mass += other.position
+            if other is self:
+                continue
+            other_x, other_y = other.position.x, other.position.y
+            dx = px - other_x
+            dy = py - other_y
+            if topological:
+                dx -= width * round(dx / width)
+                dy -= height * round(dy / height)
+                other_x, other_y = px - dx, py - dy
+            distance_sq = dx * dx + dy * dy
+            if every_neighbour or distance_sq < perception_sq:
+                center_x += other_x
+                center_y += other_y
+                velocity_x += other.velocity.x
+                velocity_y += other.velocity.y
                 count += 1
+                if neighbours is not None:
+                    neighbours.append(other)
+            if 0 < distance_sq < separation_sq:
+                distance = math.sqrt(distance_sq)
+                # Unit vector away from the other boid, weighted by distance
+                push_x += dx / distance / distance
+                push_y += dy / distance / distance
+                separation_count += 1
+
+        return (pygame.math.Vector2(center_x, center_y), pygame.math.Vector2(velocity_x, velocity_y), count,
+                pygame.math.Vector2(push_x, push_y), separation_count)
+
+    def _cohesion(self, center_of_mass, count, p):
         if count > 0:
             center_of_mass /= count
-            return self._seek(center_of_mass)
+            return self._seek(center_of_mass, p)
         return pygame.math.Vector2(0, 0)
 
-    def _alignment(self, boids):
-        avg_velocity = pygame.math.Vector2(0, 0)
-        count = 0
-        for other in boids:
-            if other != self and self.position.distance_to(other.position) < settings.PERCEPTION_RADIUS:
-                avg_velocity += other.velocity
-                count += 1
+    def _alignment(self, avg_velocity, count, p):
         if count > 0:
             avg_velocity /= count
             avg_velocity.normalize_ip()
-            avg_velocity *= settings.MAX_SPEED
+            avg_velocity *= p.max_speed
             steer = avg_velocity - self.velocity
-            if steer.length() > settings.MAX_FORCE:
-                steer.scale_to_length(settings.MAX_FORCE)
+            if steer.length() > p.max_force:
+                steer.scale_to_length(p.max_force)
             return steer
         return pygame.math.Vector2(0, 0)
 
-    def _separation(self, boids):
-        steer = pygame.math.Vector2(0, 0)
-        count = 0
-        for other in boids:
-            distance = self.position.distance_to(other.position)
-            if other != self and distance < settings.SEPARATION_RADIUS:
-                diff = self.position - other.position
-                diff.normalize_ip()
-                diff /= distance # Weight by distance
-                steer += diff
-                count += 1
+    def _separation(self, steer, count, p):
         if count > 0:
             steer /= count
             if steer.length() > 0:
                 steer.normalize_ip()
-                steer *= settings.MAX_SPEED
+                steer *= p.max_speed
                 steer -= self.velocity
-                if steer.length() > settings.MAX_FORCE:
-                    steer.scale_to_length(settings.MAX_FORCE)
+                if steer.length() > p.max_force:
+                    steer.scale_to_length(p.max_force)
             return steer
         return pygame.math.Vector2(0, 0)
 
-    def update(self, all_boids):
+    def update(self, all_boids, p=None, neighbours=None, obstacles=None):
+        """
+        Advances the boid by one tick.
+        :param all_boids: The boids that may be its neighbours.
+        :param p: The tick's params.SimulationParams snapshot, defaults to the current one.
+        :param neighbours: Optional list that receives the boids found within the perception radius.
+        :param obstacles: Optional obstacles.ObstacleField to steer around.
+        """
+        p = p or params.current()
         self.acceleration *= 0 # Reset acceleration each frame
 
-        cohesion_force = self._cohesion(all_boids) * settings.COHESION_WEIGHT
-        alignment_force = self._alignment(all_boids) * settings.ALIGNMENT_WEIGHT
-        separation_force = self._separation(all_boids) * settings.SEPARATION_WEIGHT
+        # One fused neighbour pass feeds all three rules
+        center_of_mass, velocity_sum, count, push, separation_count = self._gather(all_boids, p, neighbours)
+
+        cohesion_force = self._cohesion(center_of_mass, count, p) * p.cohesion_weight
+        alignment_force = self._alignment(velocity_sum, count, p) * p.alignment_weight
+        separation_force = self._separation(push, separation_count, p) * p.separation_weight
         
         # save the forces to self
         self._cohesion_force = cohesion_force
@@ -92,18 +137,20 @@ class Boid:
         self._apply_force(cohesion_force)
         self._apply_force(alignment_force)
         self._apply_force(separation_force)
+        if obstacles is not None:
+            self._apply_force(obstacles.steer_one(self.position, self.velocity, p.max_speed, p.max_force))
 
         self.velocity += self.acceleration
-        if self.velocity.length() > settings.MAX_SPEED:
-            self.velocity.scale_to_length(settings.MAX_SPEED)
+        if self.velocity.length() > p.max_speed:
+            self.velocity.scale_to_length(p.max_speed)
         
         self.position += self.velocity
 
         # Wrap around screen edges
-        if self.position.x < 0: self.position.x = settings.SCREEN_WIDTH
-        if self.position.x > settings.SCREEN_WIDTH: self.position.x = 0
-        if self.position.y < 0: self.position.y = settings.SCREEN_HEIGHT
-        if self.position.y > settings.SCREEN_HEIGHT: self.position.y = 0
+        if self.position.x < 0: self.position.x = p.world_width
+        if self.position.x > p.world_width: self.position.x = 0
+        if self.position.y < 0: self.position.y = p.world_height
+        if self.position.y > p.world_height: self.position.y = 0
 
     def draw(self, screen):
         # Calculate rotation based on velocity
@@ -127,12 +174,22 @@ class Boid:
         pygame.draw.polygon(screen, self.color, rotated_points)
         
         if self._render_forces:
-            # draw the cohesion , alignment, and separation force
-            pygame.draw.line(screen, settings.CYAN, self.position, self.position + self._cohesion_force * 500, 3)
-            pygame.draw.line(screen, settings.GREEN, self.position, self.position + self._alignment_force * 500, 3)
-            pygame.draw.line(screen, settings.RED, self.position, self.position + self._separation_force * 500, 3)
-            
-
-            # Draw perception and separation circles
-            pygame.draw.circle(screen, settings.YELLOW, (int(self.position.x), int(self.position.y)), settings.PERCEPTION_RADIUS, 1)
-            pygame.draw.circle(screen, settings.RED, (int(self.position.x), int(self.position.y)), settings.SEPARATION_RADIUS, 1)
+            self.draw_forces(screen)
+
+    def draw_forces(self, screen, position=None, scale=1.0):
+        """
+        Draws the steering forces and the perception and separation radii.
+        :param position: Where to draw them on screen, defaults to the boid's position.
+        :param scale: Screen pixels per world unit, for a zoomed camera.
+        """
+        p = params.current()
+        position = self.position if position is None else pygame.math.Vector2(position)
+        # draw the cohesion , alignment, and separation force
+        pygame.draw.line(screen, settings.CYAN, position, position + self._cohesion_force * 500 * scale, 3)
+        pygame.draw.line(screen, settings.GREEN, position, position + self._alignment_force * 500 * scale, 3)
+        pygame.draw.line(screen, settings.RED, position, position + self._separation_force * 500 * scale, 3)
+        
+
+        # Draw perception and separation circles
+        pygame.draw.circle(screen, settings.YELLOW, (int(position.x), int(position.y)), p.perception_radius * scale, 1)
+        pygame.draw.circle(screen, settings.RED, (int(position.x), int(position.y)), p.separation_radius * scale, 1)
@@ -0,0 +1,182 @@
+# camera.py
+
+import math
+import numpy as np
+import pygame
+import settings # Import settings as a module to access its attributes dynamically
+
+def _cell_order(cells, cell_count):
+    """
+    Stable order that groups boids by cell, in O(N): a radix sort over 16-bit digits of the
+    cell numbers, each digit sorted by NumPy's counting sort for 16-bit integers.
+    """
+    order = np.argsort((cells & 0xFFFF).astype(np.uint16), kind="stable")
+    if cell_count > 0x10000:
+        order = order[np.argsort((cells[order] >> 16).astype(np.uint16), kind="stable")]
+    return order
+
+class VisibilityIndex:
+    def __init__(self, cell_size=None):
+        """
+        Uniform grid over the world answering "which boids are inside this rectangle".
+        Boids are sorted by cell once per rebuild, in linear time, so every grid row of a
+        query is one contiguous slice and a query costs in proportion to the boids it returns.
+        :param cell_size: Grid cell size in world units, defaults to settings.CULL_CELL_SIZE.
+        """
+        self.cell_size = cell_size or settings.CULL_CELL_SIZE
+        self.key = None
+        self._order = np.zeros(0, dtype=int)
+        self._starts = np.zeros(1, dtype=int)
+        self.cols = self.rows = 1
+
+    def rebuild(self, positions, world_size, key=None):
+        """Re-bins the boids; key (e.g. the tick) lets callers skip rebuilds for unchanged positions."""
+        self.cols = max(1, int(math.ceil(world_size[0] / self.cell_size)))
+        self.rows = max(1, int(math.ceil(world_size[1] / self.cell_size)))
+        cols = np.clip((positions[:, 0] // self.cell_size).astype(int), 0, self.cols - 1)
+        rows = np.clip((positions[:, 1] // self.cell_size).astype(int), 0, self.rows - 1)
+        cells = rows * self.cols + cols
+        cell_count = self.rows * self.cols
+        self._order = _cell_order(cells, cell_count)
+        self._starts = np.zeros(cell_count + 1, dtype=int)
+        np.cumsum(np.bincount(cells, minlength=cell_count), out=self._starts[1:])
+        self.key = key
+
+    def query(self, rect):
+        """Returns the indices of the boids in the cells overlapping rect (x, y, width, height), unsorted."""
+        x, y, width, height = rect
+        first_col = max(0, int(x // self.cell_size))
+        last_col = min(self.cols - 1, int((x + width) // self.cell_size))
+        first_row = max(0, int(y // self.cell_size))
+        last_row = min(self.rows - 1, int((y + height) // self.cell_size))
+        if first_col > last_col or first_row > last_row:
+            return np.zeros(0, dtype=int)
+        slices = [self._order[self._starts[row * self.cols + first_col]:self._starts[row * self.cols + last_col + 1]]
+                  for row in range(first_row, last_row + 1)]
+        return np.concatenate(slices)
+
+class Camera:
+    def __init__(self, screen_size, world_size):
+        """
+        Pan/zoom view of a world that may be larger than the screen. Zoom is quantised to
+        settings.CAMERA_ZOOM_STEPS levels per doubling, so the renderer only ever builds
+        a handful of scaled sprite atlases.
+        :param screen_size: (width, height) of the viewport in pixels.
+        :param world_size: (width, height) of the world.
+        """
+        self.screen_size = tuple(screen_size)
+        self.world_size = tuple(world_size)
+        self.index = VisibilityIndex()
+        # Lowest level still at least as close as fitting the whole world on screen
+        fit = min(self.screen_size[0] / self.world_size[0], self.screen_size[1] / self.world_size[1], 1.0)
+        self.min_level = int(math.floor(math.log2(fit) * settings.CAMERA_ZOOM_STEPS))
+        self.max_level = int(round(math.log2(settings.CAMERA_MAX_ZOOM) * settings.CAMERA_ZOOM_STEPS))
+        self.reset()
+
+    def reset(self):
+        """Back to zoom 1, centred on the world."""
+        self.level = 0
+        self.center = [self.world_size[0] / 2, self.world_size[1] / 2]
+        self._clamp()
+
+    @property
+    def zoom(self):
+        return 2.0 ** (self.level / settings.CAMERA_ZOOM_STEPS)
+
+    def is_identity(self):
+        """True when world and screen coincide, so drawing needs no transform or culling."""
+        x, y, _, _ = self.visible_rect()
+        return self.level == 0 and self.world_size == self.screen_size and x == 0 and y == 0
+
+    def visible_rect(self):
+        """Returns the visible part of the world as (x, y, width, height) in world units."""
+        width, height = self.screen_size[0] / self.zoom, self.screen_size[1] / self.zoom
+        return (self.center[0] - width / 2, self.center[1] - height / 2, width, height)
+
+    def _clamp(self):
+        """Keeps the view inside the world, or centred on it when the world is smaller than the view."""
+        _, _, width, height = self.visible_rect()
+        for axis, extent in enumerate((width, height)):
+            size = self.world_size[axis]
+            if extent >= size:
+                self.center[axis] = size / 2
+            else:
+                self.center[axis] = min(max(self.center[axis], extent / 2), size - extent / 2)
+
+    def to_screen(self, positions):
+        """Maps N x 2 world positions to screen pixels."""
+        x, y, _, _ = self.visible_rect()
+        return (positions - (x, y)) * self.zoom
+
+    def to_world(self, point):
+        x, y, _, _ = self.visible_rect()
+        return (x + point[0] / self.zoom, y + point[1] / self.zoom)
+
+    def pan(self, dx, dy):
+        """Moves the view by a screen-pixel offset (e.g. a mouse drag)."""
+        self.center[0] -= dx / self.zoom
+        self.center[1] -= dy / self.zoom
+        self._clamp()
+
+    def zoom_at(self, steps, screen_point):
+        """Zooms in (steps > 0) or out by whole levels, keeping the world point under screen_point fixed."""
+        anchor = self.to_world(screen_point)
+        self.level = min(max(self.level + steps, self.min_level), self.max_level)
+        self.center[0] = anchor[0] - (screen_point[0] - self.screen_size[0] / 2) / self.zoom
+        self.center[1] = anchor[1] - (screen_point[1] - self.screen_size[1] / 2) / self.zoom
+        self._clamp()
+
+    def handle_event(self, event):
+        """Mouse wheel zooms at the cursor and a right-button drag pans. Returns True if the event was used."""
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom_at(event.y, pygame.mouse.get_pos())
+            return True
+        if event.type == pygame.MOUSEMOTION and event.buttons[2]:
+            self.pan(*event.rel)
+            return True
+        return False
+
+    def visible(self, positions, key=None, margin=0.0):
+        """
+        Returns the indices of the boids inside the view (plus margin world units around it).
+        The index is only rebuilt when key changes, so pass the tick the positions belong to.
+        """
+        if key is None or key != self.index.key or len(self.index._order) != len(positions):
+            self.index.rebuild(positions, self.world_size, key)
+        x, y, width, height = self.visible_rect()
+        return self.index.query((x - margin, y - margin, width + 2 * margin, height + 2 * margin))
+
+    def visible_looks(self, positions, looks, key=None, margin=0.0):
+        """visible() widened by half the largest sprite in looks, so boids straddling the edge are kept."""
+        return self.visible(positions, key, margin + max(max(size) for _, size, _ in looks) / 2)
+
+    def draw_flock(self, screen, renderer, positions, velocities, size, color, key=None, margin=0.0):
+        """
+        Draws only the boids in view, transformed to the screen and scaled by the zoom.
+        :return: The indices of the boids drawn, e.g. for debug overlays.
+        """
+        return self.draw_looks(screen, renderer, positions, velocities, [(slice(0, len(positions)), size, color)],
+                               key, margin)
+
+    def draw_looks(self, screen, renderer, positions, velocities, looks, key=None, margin=0.0):
+        """
+        draw_flock for boids in several looks (e.g. species), culled together in one query.
+        :param looks: (rows, size, color) of every group of boids drawn alike, rows being a slice.
+        """
+        visible = self.visible_looks(positions, looks, key, margin)
+        self.draw_visible(screen, renderer, visible, positions[visible], velocities[visible], looks)
+        return visible
+
+    def draw_visible(self, screen, renderer, visible, positions, velocities, looks):
+        """
+        Draws boids already culled with visible_looks(), so a frame only touches the boids in view.
+        :param visible: Their indices in the flock, which tell the looks apart.
+        :param positions: World positions of just those boids, one row per index; likewise velocities.
+        """
+        zoom = self.zoom
+        for rows, size, color in looks:
+            shown = slice(None)
+            if len(looks) > 1:
+                shown = (visible >= rows.start) & (visible < rows.stop)
+            renderer.draw(screen, self.to_screen(positions[shown]), velocities[shown],
+                          (size[0] * zoom, size[1] * zoom), color)
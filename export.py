@@ -0,0 +1,155 @@
+# export.py
+
+import os
+# Frames are rendered offscreen, so no display is needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import queue
+import sys
+import threading
+import time
+import pygame
+import params
+import settings # Import settings as a module to access its attributes dynamically
+from renderer import FlockRenderer
+
+class FrameWriter(threading.Thread):
+    def __init__(self, output, size, queue_size=None):
+        """
+        Background thread writing raw RGB frames, so encoding and disk I/O overlap with
+        the simulation. Frames arrive through a bounded queue; when the writer falls
+        behind, put() blocks instead of letting memory grow.
+        :param output: A path ending in .rgb for one raw RGB24 stream, otherwise a
+                       directory that receives a frame_000000.png sequence.
+        :param size: (width, height) of every frame.
+        :param queue_size: Frames that may be waiting, defaults to settings.EXPORT_QUEUE_SIZE.
+        """
+        super().__init__(daemon=True)
+        self.output = output
+        self.size = tuple(size)
+        self.raw = output.endswith(".rgb")
+        self.frames = queue.Queue(maxsize=queue_size or settings.EXPORT_QUEUE_SIZE)
+        self.written = 0
+        self.error = None
+        if not self.raw:
+            os.makedirs(output, exist_ok=True)
+        self.start()
+
+    def put(self, data):
+        """Queues one frame of RGB bytes, blocking while the queue is full."""
+        if self.error is not None:
+            raise RuntimeError(f"Frame writer failed: {self.error}")
+        self.frames.put(data)
+
+    def run(self):
+        stream = open(self.output, "wb") if self.raw else None
+        try:
+            while True:
+                data = self.frames.get()
+                if data is None:
+                    break
+                if stream is not None:
+                    stream.write(data)
+                else:
+                    frame = pygame.image.frombuffer(data, self.size, "RGB")
+                    pygame.image.save(frame, os.path.join(self.output, f"frame_{self.written:06d}.png"))
+                self.written += 1
+        except Exception as e:
+            self.error = e
+            # Keep draining so a blocked put() can return and see the error
+            while self.frames.get() is not None:
+                pass
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def close(self):
+        """Waits for every queued frame to be written."""
+        self.frames.put(None)
+        self.join()
+        if self.error is not None:
+            raise RuntimeError(f"Frame writer failed: {self.error}")
+
+class FlockExporter:
+    def __init__(self, output, scale=1.0, queue_size=None):
+        """
+        Renders the whole world offscreen, at scale pixels per world unit, and hands
+        each frame to a FrameWriter.
+        :param output: See FrameWriter.
+        :param scale: Resolution multiplier; positions and boid sizes are scaled, not the image.
+        """
+        self.scale = scale
+        p = params.current()
+        self.size = (int(p.world_width * scale), int(p.world_height * scale))
+        self.surface = pygame.Surface(self.size)
+        # Always draw full triangles; the point LOD is meant for the live window
+        self.renderer = FlockRenderer(lod_threshold=float("inf"))
+        self.writer = FrameWriter(output, self.size, queue_size)
+
+    def capture(self, simulation):
+        """Renders the current state of a Simulation and queues it."""
+        if simulation.obstacles is not None:
+            # As in the window, the obstacle layer doubles as the cleared background
+            simulation.obstacles.draw(self.surface, scale=self.scale)
+        else:
+            self.surface.fill(settings.BLACK)
+        positions, velocities = simulation.state()
+        for rows, size, color in simulation.looks():
+            self.renderer.draw(self.surface, positions[rows] * self.scale, velocities[rows],
+                               (size[0] * self.scale, size[1] * self.scale), color)
+        self.capture_surface(self.surface)
+
+    def capture_surface(self, surface):
+        """Queues an already rendered surface (e.g. the live window), which must match the export size."""
+        self.writer.put(pygame.image.tostring(surface, "RGB"))
+
+    def close(self):
+        self.writer.close()
+
+def export_run(output, ticks, scale=1.0, every=1, seed=None, boid_count=None, engine=None, overrides=None):
+    """
+    Simulates a run headlessly and exports a frame every `every` ticks.
+    :return: A dict with the frame count, frame size and timing.
+    """
+    from headless import apply_overrides
+    from simulation import Simulation
+
+    apply_overrides(overrides)
+    pygame.init()
+    simulation = Simulation(engine, boid_count, seed)
+    exporter = FlockExporter(output, scale)
+
+    start = time.perf_counter()
+    frames = 0
+    for tick in range(ticks):
+        simulation.update()
+        if tick % every == 0:
+            exporter.capture(simulation)
+            frames += 1
+    exporter.close()
+    simulation.close()
+    elapsed = time.perf_counter() - start
+    return {"output": output, "frames": frames, "size": list(exporter.size), "elapsed": elapsed}
+
+if __name__ == "__main__":
+    import argparse
+    from headless import parse_override
+    from simulation import ENGINES
+    parser = argparse.ArgumentParser(description="Export a simulated run as an image sequence or raw RGB stream.")
+    parser.add_argument("output", help="directory for a PNG sequence, or a .rgb file for a raw RGB24 stream")
+    parser.add_argument("--ticks", type=int, default=600, help="number of simulation ticks")
+    parser.add_argument("--every", type=int, default=1, help="export one frame every N ticks")
+    parser.add_argument("--scale", type=float, default=1.0, help="pixels per world unit (WORLD_WIDTH x WORLD_HEIGHT)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the initial flock")
+    parser.add_argument("--boids", type=int, default=None, help="number of boids (default: settings.BOID_COUNT)")
+    parser.add_argument("--engine", choices=ENGINES, default=settings.SIMULATION_ENGINE)
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a setting (repeatable)")
+    args = parser.parse_args()
+
+    result = export_run(args.output, args.ticks, args.scale, args.every, args.seed, args.boids, args.engine,
+                        dict(parse_override(o) for o in args.overrides))
+    width, height = result["size"]
+    print(f"Wrote {result['frames']} {width}x{height} frames to {result['output']} in {result['elapsed']:.1f}s",
+          file=sys.stderr)
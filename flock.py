@@ -0,0 +1,310 @@
+# flock.py
+
+import numpy as np
+import params
+import settings # Import settings as a module to access its attributes dynamically
+from kdtree import KDTree, wrap_offsets
+from renderer import FlockRenderer
+
+# Number of boids whose pairwise terms are evaluated together; bounds the
+# temporary (CHUNK_SIZE x candidates) arrays instead of a full N x N matrix
+CHUNK_SIZE = 128
+
+def _normalize(vectors):
+    """Returns unit vectors row-wise, leaving zero-length rows at zero."""
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    safe = np.where(lengths > 0, lengths, 1.0)
+    return vectors / safe[:, None]
+
+def _limit(vectors, max_length):
+    """Scales rows longer than max_length down to max_length."""
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    scale = np.where(lengths > max_length, max_length / np.where(lengths > 0, lengths, 1.0), 1.0)
+    return vectors * scale[:, None]
+
+# Columns of the per-boid neighbour sums: centre of mass (2), velocity (2),
+# separation push (2), neighbour count, separation count
+SUM_COLUMNS = 8
+
+def partition(positions, reach):
+    """
+    Sweeps the flock along x: with the boids sorted by x, each chunk of CHUNK_SIZE boids
+    only needs the contiguous run of candidates (its halo) within reach of its x extent.
+    :return: (order, chunks) where order sorts the boids by x and every chunk is a
+             (start, stop, first, last) tuple of rows and candidates in sorted order.
+    """
+    order = np.argsort(positions[:, 0], kind="stable")
+    sorted_x = positions[order, 0]
+    starts = np.arange(0, len(order), CHUNK_SIZE)
+    stops = np.minimum(starts + CHUNK_SIZE, len(order))
+    firsts = np.searchsorted(sorted_x, sorted_x[starts] - reach, side="left")
+    lasts = np.searchsorted(sorted_x, sorted_x[stops - 1] + reach, side="right")
+    return order, list(zip(starts.tolist(), stops.tolist(), firsts.tolist(), lasts.tolist()))
+
+def chunk_sums(rows, candidates, offset, perception_sq, separation_sq, pairs=None):
+    """
+    Neighbour sums for one chunk of boids. Plain element-wise sums are used rather than
+    BLAS so the result is bit-for-bit the same in whichever process computes it.
+    :param rows: B x 4 array of (x, y, vx, vy) for the boids in the chunk.
+    :param candidates: K x 4 array of the boids that may be their neighbours.
+    :param offset: Row i is candidate i + offset (so a boid can skip itself).
+    :param pairs: Optional list; the (rows, candidates) index arrays of the neighbour
+                  pairs are appended to it, each pair once (candidate after row).
+    :return: B x SUM_COLUMNS array of sums.
+    """
+    dx = rows[:, 0, None] - candidates[None, :, 0]
+    dy = rows[:, 1, None] - candidates[None, :, 1]
+    distance_sq = dx * dx + dy * dy
+
+    sums = np.empty((len(rows), SUM_COLUMNS))
+    index = np.arange(len(rows))
+    near = distance_sq < perception_sq
+    near[index, index + offset] = False # A boid is not its own neighbour
+    if pairs is not None:
+        pairs.append(np.nonzero(np.triu(near, offset + 1)))
+    weights = near.astype(float)
+    for column in range(4):
+        sums[:, column] = (weights * candidates[None, :, column]).sum(axis=1)
+    sums[:, 6] = weights.sum(axis=1)
+
+    close = (distance_sq < separation_sq) & (distance_sq > 0)
+    # Unit vector away from each close boid, weighted by distance: d / |d|^2
+    inverse_sq = np.divide(1.0, distance_sq, out=np.zeros_like(distance_sq), where=close)
+    sums[:, 4] = (dx * inverse_sq).sum(axis=1)
+    sums[:, 5] = (dy * inverse_sq).sum(axis=1)
+    sums[:, 7] = close.sum(axis=1)
+    return sums
+
+class Flock:
+    def __init__(self, count, rng=None):
+        """
+        Structure-of-arrays flock: every boid is a row in contiguous N x 2 arrays and the
+        three steering rules run as batched NumPy operations. Boid stays the reference
+        implementation; for the same state both produce the same forces.
+        :param count: Number of boids.
+        :param rng: Optional numpy Generator, for reproducible flocks.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        p = params.current()
+        self.positions = np.column_stack((rng.uniform(0, p.world_width, count),
+                                          rng.uniform(0, p.world_height, count)))
+        self.velocities = _normalize(rng.uniform(-1, 1, (count, 2))) * p.max_speed
+        self.accelerations = np.zeros((count, 2))
+        self.size = (10, 20) # Default size for boids
+        self.color = settings.WHITE # Default color
+        self.renderer = FlockRenderer()
+        self.neighbour_checks = 0 # Pairs examined during the last tick
+        self.track_pairs = False # Keep the neighbour pairs of each tick, for analytics
+        self.pairs = None # (firsts, seconds) boid indices of the last tick's neighbour pairs
+        # random 0.1 probability
+        self.render_forces = rng.random(count) < 0.1
+
+        self.cohesion_forces = np.zeros((count, 2))
+        self.alignment_forces = np.zeros((count, 2))
+        self.separation_forces = np.zeros((count, 2))
+
+    @classmethod
+    def from_boids(cls, boids):
+        """Builds a Flock holding the same state as a list of Boid objects."""
+        flock = cls(0)
+        flock.positions = np.array([(b.position.x, b.position.y) for b in boids], dtype=float).reshape(-1, 2)
+        flock.velocities = np.array([(b.velocity.x, b.velocity.y) for b in boids], dtype=float).reshape(-1, 2)
+        flock.accelerations = np.zeros_like(flock.positions)
+        flock.render_forces = np.array([b._render_forces for b in boids], dtype=bool)
+        flock.cohesion_forces = np.zeros_like(flock.positions)
+        flock.alignment_forces = np.zeros_like(flock.positions)
+        flock.separation_forces = np.zeros_like(flock.positions)
+        return flock
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def looks(self):
+        """(rows, size, color) of every group of boids drawn alike; here one group of all of them."""
+        return [(slice(0, len(self.positions)), self.size, self.color)]
+
+    def compute_forces(self, p=None):
+        """
+        Evaluates cohesion, alignment and separation for every boid from the current
+        state and stores the weighted forces in *_forces.
+        :param p: The tick's params.SimulationParams snapshot, defaults to the current one.
+        """
+        p = p or params.current()
+        if p.neighbour_count > 0:
+            self._steer(self._topological_sums(p), p)
+        else:
+            self._steer(self._neighbour_sums(p.perception_radius_sq, p.separation_radius_sq, p.reach), p)
+
+    def _neighbour_sums(self, perception_sq, separation_sq, reach):
+        """Returns the N x SUM_COLUMNS neighbour sums of every boid, in boid order."""
+        state = np.hstack((self.positions, self.velocities))
+        order, chunks = partition(self.positions, reach)
+        sorted_state = state[order]
+
+        sums = np.empty((len(state), SUM_COLUMNS))
+        self.neighbour_checks = sum((stop - start) * (last - first) for start, stop, first, last in chunks)
+        pairs = [] if self.track_pairs else None
+        for start, stop, first, last in chunks:
+            sums[order[start:stop]] = chunk_sums(sorted_state[start:stop], sorted_state[first:last],
+                                                 start - first, perception_sq, separation_sq, pairs)
+            if pairs is not None:
+                rows, columns = pairs.pop()
+                pairs.append((rows + start, columns + first))
+        self._keep_pairs(order, pairs)
+        return sums
+
+    def _topological_sums(self, p):
+        """
+        Neighbour sums in topological mode: every boid's neighbours are its p.neighbour_count
+        nearest boids, found with a KD-tree and measured across the world's edges, so the
+        work per boid stays bounded however densely the flock packs. The separation push
+        still only counts those inside the separation radius, and with p.perception_limited
+        only the nearest boids inside the perception radius are neighbours at all.
+        """
+        tree = KDTree(self.positions, (p.world_width, p.world_height))
+        neighbours = tree.nearest(p.neighbour_count)
+        self.neighbour_checks = tree.neighbour_checks
+        dx, dy = wrap_offsets(self.positions[:, None, 0] - self.positions[neighbours, 0],
+                              self.positions[:, None, 1] - self.positions[neighbours, 1],
+                              (p.world_width, p.world_height))
+        distance_sq = dx * dx + dy * dy
+        if p.perception_limited:
+            near = distance_sq < p.perception_radius_sq
+        else:
+            near = np.ones(neighbours.shape, dtype=bool)
+
+        sums = np.empty((len(self.positions), SUM_COLUMNS))
+        # Each neighbour counts at its nearest image, which may be across an edge
+        sums[:, 0] = np.where(near, self.positions[:, None, 0] - dx, 0).sum(axis=1)
+        sums[:, 1] = np.where(near, self.positions[:, None, 1] - dy, 0).sum(axis=1)
+        sums[:, 2] = np.where(near, self.velocities[neighbours, 0], 0).sum(axis=1)
+        sums[:, 3] = np.where(near, self.velocities[neighbours, 1], 0).sum(axis=1)
+        sums[:, 6] = near.sum(axis=1)
+
+        close = (distance_sq < p.separation_radius_sq) & (distance_sq > 0)
+        inverse_sq = np.divide(1.0, distance_sq, out=np.zeros_like(distance_sq), where=close)
+        sums[:, 4] = (dx * inverse_sq).sum(axis=1)
+        sums[:, 5] = (dy * inverse_sq).sum(axis=1)
+        sums[:, 7] = close.sum(axis=1)
+
+        if self.track_pairs:
+            # Nearest-neighbour links are not symmetric; keep each linked pair once
+            count = len(self.positions)
+            firsts = np.repeat(np.arange(count), neighbours.shape[1])[near.ravel()]
+            seconds = neighbours[near]
+            links = np.unique(np.minimum(firsts, seconds) * count + np.maximum(firsts, seconds))
+            self.pairs = (links // count, links % count)
+        else:
+            self.pairs = None
+        return sums
+
+    def _keep_pairs(self, order, pairs):
+        """Stores the collected pairs, given as sorted indices, as boid indices in self.pairs."""
+        if pairs is None:
+            self.pairs = None
+        elif pairs:
+            self.pairs = (order[np.concatenate([rows for rows, _ in pairs])],
+                          order[np.concatenate([columns for _, columns in pairs])])
+        else:
+            self.pairs = (np.empty(0, dtype=int), np.empty(0, dtype=int))
+
+    def _steer(self, sums, p):
+        """Turns the neighbour sums into the three weighted steering forces."""
+        positions, velocities = self.positions, self.velocities
+        center_sum, velocity_sum, push_sum = sums[:, 0:2], sums[:, 2:4], sums[:, 4:6]
+        neighbour_count, separation_count = sums[:, 6], sums[:, 7]
+
+        has_neighbours = neighbour_count > 0
+        divisor = np.where(has_neighbours, neighbour_count, 1.0)[:, None]
+
+        # Cohesion: seek the centre of mass of the neighbours
+        desired = _normalize(center_sum / divisor - positions) * p.max_speed
+        cohesion = _limit(desired - velocities, p.max_force)
+        cohesion[~has_neighbours] = 0
+
+        # Alignment: steer towards the neighbours' average heading
+        desired = _normalize(velocity_sum / divisor) * p.max_speed
+        alignment = _limit(desired - velocities, p.max_force)
+        alignment[~has_neighbours] = 0
+
+        # Separation: steer away from boids inside the separation radius
+        push = push_sum / np.where(separation_count > 0, separation_count, 1.0)[:, None]
+        pushing = np.hypot(push[:, 0], push[:, 1]) > 0
+        separation = _limit(_normalize(push) * p.max_speed - velocities, p.max_force)
+        separation[~pushing] = 0
+
+        self.cohesion_forces = cohesion * p.cohesion_weight
+        self.alignment_forces = alignment * p.alignment_weight
+        self.separation_forces = separation * p.separation_weight
+
+    def update(self, p=None, obstacles=None):
+        """
+        Advances every boid by one tick.
+        :param p: The tick's params.SimulationParams snapshot, defaults to the current one.
+        :param obstacles: Optional obstacles.ObstacleField to steer around.
+        """
+        p = p or params.current()
+        self.compute_forces(p)
+        self.accelerations = self.cohesion_forces + self.alignment_forces + self.separation_forces
+        if obstacles is not None:
+            self.accelerations += obstacles.steer(self.positions, self.velocities, p.max_speed, p.max_force)
+
+        self._move(_limit(self.velocities + self.accelerations, p.max_speed), p)
+
+    def _move(self, velocities, p):
+        """Moves every boid by its new velocity, wrapping around the world's edges, and commits the state."""
+        positions = self.positions + velocities
+
+        # Wrap around screen edges
+        x, y = positions[:, 0], positions[:, 1]
+        x[x < 0] = p.world_width
+        x[x > p.world_width] = 0
+        y[y < 0] = p.world_height
+        y[y > p.world_height] = 0
+
+        self._store(positions, velocities)
+
+    def _store(self, positions, velocities):
+        """Commits the state computed for the next tick."""
+        self.positions = positions
+        self.velocities = velocities
+
+    def close(self):
+        """Releases any resources held by the engine."""
+
+    def draw(self, screen, positions=None, forces=True):
+        """
+        Draws the flock.
+        :param positions: Optional positions to draw at instead of the current ones (e.g. interpolated).
+        :param forces: Also draw the force overlays of the boids flagged in render_forces.
+        """
+        positions = self.positions if positions is None else positions
+        for rows, size, color in self.looks:
+            self.renderer.draw(screen, positions[rows], self.velocities[rows], size, color)
+        if forces:
+            self.draw_forces(screen, positions)
+
+    def draw_forces(self, screen, positions=None, scale=1.0, indices=None, p=None):
+        """
+        Draws the force and radius overlays of the boids flagged in render_forces.
+        :param positions: Where to draw them, one row per boid (or per index when indices is given).
+        :param scale: Screen pixels per world unit, for a zoomed camera.
+        :param indices: Only draw these boids, e.g. the flagged ones in a camera's view.
+        :param p: The params.SimulationParams whose radii are drawn, defaults to the current one.
+        """
+        if indices is None:
+            indices = np.flatnonzero(self.render_forces)
+            positions = (self.positions if positions is None else positions)[indices]
+        import pygame
+        p = p or params.current()
+        for i, position in zip(indices.tolist(), positions.tolist()):
+            position = pygame.math.Vector2(position)
+            # draw the cohesion , alignment, and separation force
+            pygame.draw.line(screen, settings.CYAN, position, position + pygame.math.Vector2(self.cohesion_forces[i].tolist()) * 500 * scale, 3)
+            pygame.draw.line(screen, settings.GREEN, position, position + pygame.math.Vector2(self.alignment_forces[i].tolist()) * 500 * scale, 3)
+            pygame.draw.line(screen, settings.RED, position, position + pygame.math.Vector2(self.separation_forces[i].tolist()) * 500 * scale, 3)
+
+            # Draw perception and separation circles
+            pygame.draw.circle(screen, settings.YELLOW, (int(position.x), int(position.y)), p.perception_radius * scale, 1)
+            pygame.draw.circle(screen, settings.RED, (int(position.x), int(position.y)), p.separation_radius * scale, 1)
@@ -0,0 +1,80 @@
+# governor.py
+
+import settings # Import settings as a module to access its attributes dynamically
+
+# Quality levels, from full quality down; each level keeps the degradations of the ones before it
+LEVELS = ["full", "no force overlays", "point boids", "capped neighbours", "reduced tick rate"]
+
+class QualityGovernor:
+    def __init__(self, target_fps=None):
+        """
+        Holds the display rate by trading quality for frame time. The time each frame takes
+        to compute and draw (not counting the wait for the next frame) is averaged; while
+        it stays over the frame budget the governor drops one level in LEVELS at a time,
+        and once frames fit well within the budget again it restores them one at a time.
+        :param target_fps: Frames per second to hold, defaults to settings.DISPLAY_FPS.
+        """
+        self.budget = 1.0 / (target_fps or settings.DISPLAY_FPS)
+        self.level = 0
+        self.average = None # Moving average of the frame time, in seconds
+        self._over = 0 # Consecutive frames over budget
+        self._under = 0 # Consecutive frames with headroom
+
+    def update(self, frame_time):
+        """
+        Feeds one frame's time in seconds.
+        :return: True if the level changed.
+        """
+        if self.average is None:
+            self.average = frame_time
+        else:
+            self.average += settings.GOVERNOR_SMOOTHING * (frame_time - self.average)
+
+        if self.average > self.budget:
+            self._over, self._under = self._over + 1, 0
+        elif self.average < self.budget * settings.GOVERNOR_HEADROOM:
+            self._over, self._under = 0, self._under + 1
+        else:
+            self._over = self._under = 0
+
+        if self._over >= settings.GOVERNOR_DEGRADE_FRAMES and self.level < len(LEVELS) - 1:
+            self._set_level(self.level + 1)
+            return True
+        if self._under >= settings.GOVERNOR_RESTORE_FRAMES and self.level > 0:
+            self._set_level(self.level - 1)
+            return True
+        return False
+
+    def _set_level(self, level):
+        # Measure the new level afresh instead of judging it by the old one's frame times
+        self.level = level
+        self.average = None
+        self._over = self._under = 0
+
+    def reset(self):
+        """Back to full quality."""
+        self._set_level(0)
+
+    @property
+    def name(self):
+        return LEVELS[self.level]
+
+    @property
+    def show_forces(self):
+        """Whether the per-boid force and radius overlays are drawn."""
+        return self.level < 1
+
+    @property
+    def points_only(self):
+        """Whether boids are drawn as single points (the renderer's level of detail fallback)."""
+        return self.level >= 2
+
+    @property
+    def neighbour_cap(self):
+        """Most neighbours per boid (see Simulation.neighbour_cap), or 0 for no cap."""
+        return settings.GOVERNOR_NEIGHBOUR_CAP if self.level >= 3 else 0
+
+    @property
+    def tick_rate_scale(self):
+        """Factor applied to the selected simulation speed."""
+        return settings.GOVERNOR_TICK_RATE_SCALE if self.level >= 4 else 1.0
@@ -0,0 +1,107 @@
+# headless.py
+
+import os
+# No window is ever opened, but keep SDL away from any display just in case
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import ast
+import json
+import time
+import params
+import settings # Import settings as a module to access its attributes dynamically
+from analytics import FlockAnalytics
+from recording import Recorder
+from simulation import ENGINES, Simulation
+
+def apply_overrides(overrides):
+    """
+    Sets simulation parameters on the settings module and publishes a params snapshot built from them.
+    :param overrides: A dict mapping setting names (e.g. "PERCEPTION_RADIUS") to values.
+    """
+    if not overrides:
+        return
+    for name, value in overrides.items():
+        if not hasattr(settings, name):
+            raise ValueError(f"Unknown setting: {name}")
+        setattr(settings, name, value)
+    params.reload()
+
+def run_headless(ticks, seed=None, boid_count=None, engine=None, overrides=None, record=None, analytics=None):
+    """
+    Runs a fixed number of flocking ticks as fast as possible, with no window,
+    no clock throttling and no drawing.
+    :param ticks: Number of simulation ticks to run.
+    :param seed: Optional seed for a reproducible initial flock.
+    :param boid_count: Number of boids, defaults to settings.BOID_COUNT.
+    :param engine: "boid" or "numpy", defaults to settings.SIMULATION_ENGINE.
+    :param overrides: Optional dict of settings to change before the run.
+    :param record: Optional path to record every tick to, for replay.py.
+    :param analytics: Optional path to write the per-tick flock metrics to (.csv or .json).
+    :return: A dict with the run configuration, timing and final positions/velocities.
+    """
+    apply_overrides(overrides)
+    count = boid_count if boid_count is not None else settings.BOID_COUNT
+    recorder = Recorder(record, count, seed) if record else None
+    simulation = Simulation(engine, count, seed, recorder, FlockAnalytics() if analytics else None)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        simulation.update()
+    elapsed = time.perf_counter() - start
+
+    positions, velocities = simulation.state()
+    simulation.close()
+    if recorder is not None:
+        recorder.close()
+    if analytics:
+        simulation.analytics.dump(analytics)
+    return {
+        "engine": simulation.engine,
+        "seed": seed,
+        "boids": len(positions),
+        "ticks": ticks,
+        "elapsed": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+        "overrides": dict(overrides or {}),
+        "positions": positions.tolist(),
+        "velocities": velocities.tolist(),
+    }
+
+def parse_override(text):
+    """Parses NAME=VALUE into (NAME, value), evaluating VALUE as a Python literal."""
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise ValueError(f"Expected NAME=VALUE, got: {text}")
+    try:
+        return name.strip(), ast.literal_eval(value.strip())
+    except (ValueError, SyntaxError):
+        return name.strip(), value.strip()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the boids simulation without a display.")
+    parser.add_argument("--ticks", type=int, default=1000, help="number of simulation ticks to run")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the initial flock")
+    parser.add_argument("--boids", type=int, default=None, help="number of boids (default: settings.BOID_COUNT)")
+    parser.add_argument("--engine", choices=ENGINES, default=settings.SIMULATION_ENGINE,
+                        help="simulation engine")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a setting, e.g. --set PERCEPTION_RADIUS=100 (repeatable)")
+    parser.add_argument("--output", default=None, help="write the full result, including final state, as JSON")
+    parser.add_argument("--record", default=None, help="record every tick to this file for replay.py")
+    parser.add_argument("--analytics", default=None, help="write per-tick flock metrics to this file (.csv or .json)")
+    parser.add_argument("--species", default=None, help="JSON file of species to simulate (sets the boid count)")
+    args = parser.parse_args()
+    if args.species:
+        from species import use_species
+        use_species(args.species)
+
+    result = run_headless(args.ticks, args.seed, args.boids, args.engine,
+                          dict(parse_override(o) for o in args.overrides), args.record, args.analytics)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+    summary = {k: v for k, v in result.items() if k not in ("positions", "velocities")}
+    print(json.dumps(summary))
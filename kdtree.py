@@ -0,0 +1,163 @@
+# kdtree.py
+
+import math
+import numpy as np
+import settings # Import settings as a module to access its attributes dynamically
+
+# Query leaves whose k nearest neighbours are searched together; bounds the
+# temporary (points x candidates) arrays like flock.CHUNK_SIZE does
+QUERY_POINTS = 256
+
+def wrap_offsets(dx, dy, world_size):
+    """Shortest offsets across the edges of a toroidal world of (width, height)."""
+    width, height = world_size
+    return dx - width * np.round(dx / width), dy - height * np.round(dy / height)
+
+def _axis_gap(low_a, high_a, low_b, high_b, size):
+    """Smallest distance along one axis between two intervals, directly or across the wrap."""
+    direct = np.maximum(np.maximum(low_b - high_a, low_a - high_b), 0)
+    around = np.minimum(np.maximum(low_b + size - high_a, 0), np.maximum(low_a + size - high_b, 0))
+    return np.minimum(direct, around)
+
+class KDTree:
+    def __init__(self, positions, world_size, leaf_size=None):
+        """
+        Balanced 2-d tree over the boids of a toroidal world, rebuilt from scratch every tick.
+        Every node is a contiguous run of the boids in tree order (each level splits every
+        node at its median along its wider axis), so the tree is just that order plus the
+        node boundaries and bounding boxes of each level, and both building and searching
+        are whole-level NumPy operations.
+        :param positions: N x 2 boid positions.
+        :param world_size: (width, height) of the world; distances wrap around its edges.
+        :param leaf_size: Most boids per leaf, defaults to settings.KDTREE_LEAF_SIZE.
+        """
+        self.positions = positions
+        self.world_size = tuple(world_size)
+        leaf_size = max(2, leaf_size or settings.KDTREE_LEAF_SIZE)
+        count = len(positions)
+        self.neighbour_checks = 0 # Candidate pairs examined by the last query
+        if count == 0:
+            self.order = np.zeros(0, dtype=int)
+            self.sorted_positions = np.zeros((0, 2))
+            self.edges, self.lows, self.highs = [], [], []
+            return
+        depth = int(math.ceil(math.log2(count / leaf_size))) if count > leaf_size else 0
+
+        order = np.arange(count)
+        edges = np.array([0, count])
+        self.edges = [edges]
+        for _ in range(depth):
+            sizes = np.diff(edges)
+            node = np.repeat(np.arange(len(sizes)), sizes)
+            points = positions[order]
+            extent = np.maximum.reduceat(points, edges[:-1], axis=0) - np.minimum.reduceat(points, edges[:-1], axis=0)
+            axis = (extent[:, 1] > extent[:, 0]).astype(int)
+            order = order[np.lexsort((points[np.arange(count), axis[node]], node))]
+            middles = edges[:-1] + sizes // 2
+            edges = np.column_stack((edges[:-1], middles)).ravel()
+            edges = np.append(edges, count)
+            self.edges.append(edges)
+        self.order = order
+        self.sorted_positions = positions[order]
+
+        # Later levels only reorder within a node, so every level's nodes are runs of the final order
+        self.lows = [np.minimum.reduceat(self.sorted_positions, edges[:-1], axis=0) for edges in self.edges]
+        self.highs = [np.maximum.reduceat(self.sorted_positions, edges[:-1], axis=0) for edges in self.edges]
+
+    def _box_distance_sq(self, low_a, high_a, low_b, high_b):
+        gap_x = _axis_gap(low_a[:, 0], high_a[:, 0], low_b[:, 0], high_b[:, 0], self.world_size[0])
+        gap_y = _axis_gap(low_a[:, 1], high_a[:, 1], low_b[:, 1], high_b[:, 1], self.world_size[1])
+        return gap_x * gap_x + gap_y * gap_y
+
+    def _distance_sq(self, points, candidates):
+        """Wrapped squared distances from P points to P x C candidate rows of sorted_positions (-1 = none)."""
+        others = self.sorted_positions[candidates]
+        dx, dy = wrap_offsets(points[:, None, 0] - others[:, :, 0], points[:, None, 1] - others[:, :, 1],
+                              self.world_size)
+        distance_sq = dx * dx + dy * dy
+        distance_sq[candidates < 0] = np.inf
+        return distance_sq
+
+    def _runs(self, edges, nodes, width):
+        """P x width matrix of the tree-order indices in each node's run, padded with -1."""
+        offsets = np.arange(width)
+        starts = edges[nodes]
+        return np.where(offsets < (edges[nodes + 1] - starts)[:, None], starts[:, None] + offsets, -1)
+
+    def _leaf_bounds(self, k):
+        """
+        Squared search radius of every leaf: the largest distance from one of its boids to
+        its k-th nearest boid within the smallest ancestor node that holds more than k boids.
+        """
+        level = len(self.edges) - 1
+        while level > 0 and np.diff(self.edges[level]).min() <= k:
+            level -= 1
+        edges = self.edges[level]
+        sizes = np.diff(edges)
+        node = np.repeat(np.arange(len(sizes)), sizes)
+        candidates = self._runs(edges, node, sizes.max())
+        distance_sq = self._distance_sq(self.sorted_positions, candidates)
+        distance_sq[candidates == np.arange(len(node))[:, None]] = np.inf
+        kth = np.partition(distance_sq, k - 1, axis=1)[:, k - 1]
+        return np.maximum.reduceat(kth, self.edges[-1][:-1])
+
+    def _candidate_leaves(self, bounds):
+        """
+        Walks all leaves down the tree at once, keeping the (query leaf, node) pairs whose
+        boxes are within the query leaf's bound, and returns the surviving leaf pairs.
+        """
+        leaf_lows, leaf_highs = self.lows[-1], self.highs[-1]
+        queries = np.arange(len(leaf_lows))
+        nodes = np.zeros(len(queries), dtype=int)
+        for level in range(1, len(self.edges)):
+            queries = np.repeat(queries, 2)
+            nodes = (nodes[:, None] * 2 + np.arange(2)).ravel()
+            near = self._box_distance_sq(leaf_lows[queries], leaf_highs[queries],
+                                         self.lows[level][nodes], self.highs[level][nodes]) <= bounds[queries]
+            queries, nodes = queries[near], nodes[near]
+        return queries, nodes
+
+    def nearest(self, k):
+        """
+        Finds the k nearest boids of every boid (fewer if the flock is smaller), across the
+        world's edges. The work per boid depends on k and the tree depth, not on how many
+        boids crowd around it.
+        :return: N x k array of boid indices, in no particular order.
+        """
+        count = len(self.order)
+        k = min(k, count - 1)
+        if k <= 0:
+            self.neighbour_checks = 0
+            return np.zeros((count, 0), dtype=int)
+
+        leaf_edges = self.edges[-1]
+        leaf_width = np.diff(leaf_edges).max()
+        queries, leaves = self._candidate_leaves(self._leaf_bounds(k))
+        query_starts = np.searchsorted(queries, np.arange(len(leaf_edges)))
+
+        found = np.empty((count, k), dtype=int)
+        checks = 0
+        step = max(1, QUERY_POINTS // leaf_width)
+        for first in range(0, len(leaf_edges) - 1, step):
+            last = min(first + step, len(leaf_edges) - 1)
+            # Lay out every query leaf's candidate leaves side by side in one padded row
+            pairs = slice(query_starts[first], query_starts[last])
+            local = queries[pairs] - first
+            slots = np.arange(len(local)) - (query_starts[queries[pairs]] - query_starts[first])
+            per_leaf = np.zeros((last - first, (slots.max() + 1) * leaf_width), dtype=int) - 1
+            columns = slots[:, None] * leaf_width + np.arange(leaf_width)
+            per_leaf[local[:, None], columns] = self._runs(leaf_edges, leaves[pairs], leaf_width)
+
+            start, stop = leaf_edges[first], leaf_edges[last]
+            point_leaf = np.repeat(np.arange(last - first), np.diff(leaf_edges[first:last + 1]))
+            candidates = per_leaf[point_leaf]
+            distance_sq = self._distance_sq(self.sorted_positions[start:stop], candidates)
+            distance_sq[candidates == np.arange(start, stop)[:, None]] = np.inf # Not its own neighbour
+            checks += int((candidates >= 0).sum())
+            nearest = np.argpartition(distance_sq, k - 1, axis=1)[:, :k]
+            found[start:stop] = np.take_along_axis(candidates, nearest, axis=1)
+
+        self.neighbour_checks = checks
+        neighbours = np.empty_like(found)
+        neighbours[self.order] = self.order[found]
+        return neighbours
@@ -1,39 +1,105 @@
 # main.py
 
 import sys
+import time
 import pygame
+import params
 import settings # Import settings as a module to access its attributes dynamically
-from boid import Boid
+from analytics import FlockAnalytics
+from camera import Camera
+from governor import QualityGovernor
+from overlay import OverlayCache
+from pipeline import SimulationThread
+from profiler import Profiler
+from recording import Recorder
+from simulation import ENGINES, Simulation
 from ui import UIManager
 
 class Game:
-    def __init__(self):
+    # Arrow keys move the view (the world slides the opposite way)
+    PAN_KEYS = {pygame.K_LEFT: (1, 0), pygame.K_RIGHT: (-1, 0), pygame.K_UP: (0, 1), pygame.K_DOWN: (0, -1)}
+
+    def __init__(self, engine=None, profile=False, profile_output=None, seed=None, record=None, export=None,
+                 analytics=False, analytics_output=None, threaded=False, governor=False):
         pygame.init()
         self.screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
         pygame.display.set_caption(settings.GAME_CAPTION)
         self.clock = pygame.time.Clock()
         self.running = True
         self.paused = False
-        self.frame_rate = settings.DEFAULT_FPS
+        # Simulation speed (ticks per second) and display rate are independent
+        self.tick_rate = settings.DEFAULT_TICK_RATE
+        self.display_fps = settings.DISPLAY_FPS
+        self._accumulator = 0.0 # Simulation time owed, in seconds
         
         # Pass the settings module to UIManager so it can modify parameters directly
         self.ui_manager = UIManager(settings) 
-        self.boids = []
-        self._create_boids()
+        # Sliders, buttons and legend are cached and only re-rendered when they change
+        self.overlay = OverlayCache((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+        # Optionally record every tick (and slider change) for replay.py
+        self.recorder = Recorder(record, settings.BOID_COUNT, seed) if record else None
+        # "boid" runs the per-object Boid reference, "numpy" the batched Flock engine
+        self.simulation = Simulation(engine, seed=seed, recorder=self.recorder)
+        # View of the world: mouse wheel zooms, right-drag or the arrow keys pan, Home resets
+        p = params.current()
+        self.camera = Camera(self.screen.get_size(), (p.world_width, p.world_height))
+
+        # Per-phase timings: F2 toggles collection, F3 the frame-time graph, F4 dumps the session
+        self.profiler = Profiler(enabled=profile)
+        self.profile_output = profile_output or settings.PROFILE_OUTPUT
+        self.show_profile_graph = False
+
+        # Optionally write every rendered frame to an image sequence or raw RGB stream
+        self.frame_writer = None
+        if export:
+            # Imported once the window is open: export points SDL at the dummy display when it loads
+            from export import FrameWriter
+            self.frame_writer = FrameWriter(export, self.screen.get_size())
+
+        # Live flock metrics in the legend: F5 toggles them, the time series is written on exit
+        self.analytics_output = analytics_output
+        if analytics or analytics_output:
+            self.simulation.set_analytics(FlockAnalytics())
+
+        # Optionally compute ticks in a background thread while this one renders; from then
+        # on the simulation is only changed through the thread's command queue
+        self.pipeline = SimulationThread(self.simulation, self.tick_rate) if threaded else None
+        self._rendered_tick = 0
+        if self.pipeline is not None:
+            self.ui_manager.publish = self.pipeline.publish
+
+        # Adaptive quality: trades overlays, sprites, neighbours and then speed for frame rate (F6 toggles)
+        self.governor = QualityGovernor(self.display_fps) if governor else None
 
-    def _create_boids(self):
-        """Create and add all boids to the scene."""
-        for _ in range(settings.BOID_COUNT):
-            self.boids.append(Boid())
-        
     def run(self):
+        previous = time.perf_counter()
         while self.running:
-            self.handle_events()
-            if not self.paused:
-                self.update()
-            self.draw()
-            self.clock.tick(self.frame_rate)
+            now = time.perf_counter()
+            elapsed, previous = now - previous, now
+
+            self.profiler.begin_frame()
+            with self.profiler.section("handle_events"):
+                self.handle_events()
+            if not self.paused and self.pipeline is None:
+                self._advance(elapsed)
+            self.draw(self._accumulator * self._tick_rate())
+            self.profiler.end_frame()
+            # Judge the frame by its own work, not by the wait for the display rate below
+            if self.governor is not None and self.governor.update(time.perf_counter() - now):
+                self._apply_quality()
+            self.clock.tick(self.display_fps)
         
+        if self.pipeline is not None:
+            self.pipeline.close()
+        if self.profiler.session:
+            self.profiler.dump(self.profile_output)
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.frame_writer is not None:
+            self.frame_writer.close()
+        if self.analytics_output and self.simulation.analytics is not None:
+            self.simulation.analytics.dump(self.analytics_output)
+        self.simulation.close()
         pygame.quit()
         sys.exit()
 
@@ -41,47 +107,196 @@ class Game:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.KEYDOWN:
+                self._handle_key(event.key)
+            else:
+                self.camera.handle_event(event)
 
             action, value = self.ui_manager.handle_event(event)
             if action == 'toggle_pause':
                 self.paused = not self.paused
-            elif action == 'set_fps':
-                self.frame_rate = value
+                if self.pipeline is not None:
+                    self.pipeline.set_paused(self.paused)
+            elif action == 'set_tick_rate':
+                self.tick_rate = value
+                self._accumulator = 0.0
                 self.paused = False # Unpause when speed is changed
+                if self.pipeline is not None:
+                    self.pipeline.set_tick_rate(self._tick_rate())
+                    self.pipeline.set_paused(False)
             elif action == 'reset':
-                self.boids = []
-                self._create_boids()
+                if self.pipeline is not None:
+                    self.pipeline.reset()
+                    self.pipeline.set_paused(False)
+                else:
+                    self.simulation.reset()
+                self._accumulator = 0.0
                 self.paused = False # Unpause on reset
             elif action == 'update_param':
-                # Parameter was updated via slider, no direct action needed here
-                # The settings module itself has been updated by UIManager
-                pass
+                # UIManager has published a new params snapshot, which the next tick
+                # (and the spatial grid's layout check) picks up
+                if self.pipeline is not None:
+                    # Stamped and written by the simulation thread, after it applies the change
+                    self.pipeline.record_event(value['name'], value['value'])
+                elif self.recorder is not None:
+                    self.recorder.record_event(value['name'], value['value'])
+
+    def _handle_key(self, key):
+        if key == pygame.K_F2:
+            self.profiler.enabled = not self.profiler.enabled
+        elif key == pygame.K_F3:
+            self.show_profile_graph = not self.show_profile_graph
+            self.profiler.enabled = self.profiler.enabled or self.show_profile_graph
+        elif key == pygame.K_F4 and self.profiler.session:
+            self.profiler.dump(self.profile_output)
+            print(f"Profile written to {self.profile_output}")
+        elif key in self.PAN_KEYS:
+            dx, dy = self.PAN_KEYS[key]
+            self.camera.pan(dx * settings.CAMERA_PAN_STEP, dy * settings.CAMERA_PAN_STEP)
+        elif key == pygame.K_HOME:
+            self.camera.reset()
+        elif key == pygame.K_F6:
+            if self.governor is None:
+                self.governor = QualityGovernor(self.display_fps)
+            else:
+                self.governor.reset()
+                self._apply_quality()
+                self.governor = None
+        elif key == pygame.K_F5:
+            set_analytics = self.pipeline.set_analytics if self.pipeline is not None else self.simulation.set_analytics
+            if self.simulation.analytics is None:
+                set_analytics(FlockAnalytics())
+            else:
+                if self.analytics_output:
+                    self.simulation.analytics.dump(self.analytics_output)
+                set_analytics(None)
+
+    def _tick_rate(self):
+        """The selected simulation speed, slowed down by the governor at its lowest level."""
+        return self.tick_rate * (self.governor.tick_rate_scale if self.governor is not None else 1.0)
+
+    def _apply_quality(self):
+        """Applies the governor's current level to the drawing and the simulation."""
+        governor = self.governor
+        self.simulation.show_forces = governor.show_forces
+        self.simulation.renderer.lod_threshold = 0 if governor.points_only else settings.RENDER_LOD_THRESHOLD
+        if self.pipeline is not None:
+            self.pipeline.set_neighbour_cap(governor.neighbour_cap)
+            self.pipeline.set_tick_rate(self._tick_rate())
+        else:
+            self.simulation.neighbour_cap = governor.neighbour_cap
+
+    def _advance(self, elapsed):
+        """
+        Fixed-timestep scheduler: runs as many simulation ticks as the elapsed wall-clock
+        time pays for, so several ticks can run per rendered frame (or none at all).
+        """
+        tick_duration = 1.0 / self._tick_rate()
+        self._accumulator += elapsed
+        ticks = 0
+        while self._accumulator >= tick_duration:
+            if ticks == settings.MAX_TICKS_PER_FRAME:
+                # Falling behind: drop the backlog rather than spiral into ever longer frames
+                self._accumulator %= tick_duration
+                break
+            self.update()
+            self._accumulator -= tick_duration
+            ticks += 1
 
     def update(self):
-        for boid in self.boids:
-            boid.update(self.boids)
+        with self.profiler.section("update"):
+            self.simulation.update(keep_previous=True)
+        self.profiler.add("ticks", 1)
+        self.profiler.add("neighbour_checks", self.simulation.neighbour_checks)
 
-    def draw(self):
-        self.screen.fill(settings.BLACK)
+    def draw(self, alpha=1.0):
+        """
+        Renders one frame.
+        :param alpha: Fraction of a tick since the last update; boids are interpolated by it.
+        """
+        if self.simulation.obstacles is not None:
+            # The cached obstacle layer doubles as the cleared background
+            self.simulation.obstacles.draw(self.screen, self.camera)
+        else:
+            self.screen.fill(settings.BLACK)
         
         # Draw boids
-        for boid in self.boids:
-            boid.draw(self.screen)
+        with self.profiler.section("draw_boids"):
+            if self.pipeline is not None:
+                self._draw_latest()
+            else:
+                self.simulation.draw(self.screen, alpha, None if self.camera.is_identity() else self.camera)
         
-        self.ui_manager.draw(self.screen, self.paused, self.frame_rate)
+        # Draw UI and legend
+        with self.profiler.section("overlay"):
+            self.overlay.draw(self.screen, self._overlay_key(), self._draw_overlay)
 
-        # Draw legend
-        self._draw_legend(self.screen)
+        if self.show_profile_graph:
+            self.profiler.draw_graph(self.screen, (settings.SCREEN_WIDTH - 330, 10, 310, 110))
         
-        pygame.display.flip()
+        if self.frame_writer is not None:
+            with self.profiler.section("export"):
+                self.frame_writer.put(pygame.image.tostring(self.screen, "RGB"))
+
+        with self.profiler.section("flip"):
+            pygame.display.flip()
+
+    def _draw_latest(self):
+        """Draws the latest tick completed by the simulation thread (without the debug force overlays)."""
+        positions, velocities, tick = self.pipeline.latest()
+        looks = self.simulation.looks()
+        if self.camera.is_identity():
+            for rows, size, color in looks:
+                self.simulation.renderer.draw(self.screen, positions[rows], velocities[rows], size, color)
+        else:
+            self.camera.draw_looks(self.screen, self.simulation.renderer, positions, velocities, looks, key=tick)
+        self.profiler.add("ticks", max(0, tick - self._rendered_tick))
+        self._rendered_tick = tick
+        # The ticks themselves ran on the simulation thread, which timed them
+        update_ms, neighbour_checks = self.pipeline.take_timings()
+        self.profiler.add("update", update_ms)
+        self.profiler.add("neighbour_checks", neighbour_checks)
+
+    def _overlay_key(self):
+        """Everything the UI and legend display; the cached overlay is rebuilt when it changes."""
+        # Every parameter change publishes a new snapshot version
+        analytics = self.simulation.analytics
+        latest = analytics.latest if analytics is not None else None
+        if latest is not None:
+            # Rounded as displayed, so the overlay is only rebuilt when the text changes
+            latest = (latest["clusters"], latest["largest_cluster"],
+                      round(latest["order_parameter"], 2), round(latest["mean_speed"], 1))
+        quality = self.governor.level if self.governor is not None else None
+        return (params.current().version, self.paused, self.tick_rate, latest, quality, self.ui_manager.panel)
+
+    def _draw_overlay(self, surface):
+        with self.profiler.section("ui"):
+            self.ui_manager.draw(surface, self.paused, self.tick_rate)
+        with self.profiler.section("legend"):
+            self._draw_legend(surface)
 
     def _draw_legend(self, screen):
         """Draws a legend for the Boids simulation."""
         legend_x = 10
-        legend_y = settings.SCREEN_HEIGHT - 160  # Adjusted slightly for more space
+        legend_y = settings.SCREEN_HEIGHT - 185  # Adjusted slightly for more space
         line_height = 25
         width = 220
-        height = 150
+        height = 175
+
+        # Live analytics and the governor's quality level, when on, add rows above the parameters
+        analytics = self.simulation.analytics
+        latest = analytics.latest if analytics is not None else None
+        analytics_items = []
+        if self.governor is not None:
+            analytics_items.append(("Quality", f"{self.governor.level} ({self.governor.name})"))
+        if latest is not None:
+            analytics_items += [
+                ("Clusters", f"{latest['clusters']} (largest {latest['largest_cluster']})"),
+                ("Order", f"{latest['order_parameter']:.2f}"),
+                ("Mean Speed", f"{latest['mean_speed']:.1f}"),
+            ]
+        legend_y -= len(analytics_items) * line_height
+        height += len(analytics_items) * line_height
 
         # --- This is the key change for transparency ---
         # 1. Create a new surface for the legend with per-pixel alpha
@@ -94,22 +309,31 @@ class Game:
         screen.blit(legend_surface, (legend_x, legend_y))
         # ----------------------------------------------------
 
-        # Legend items: (Text, Color, Value) - now dynamically fetching from settings
+        # Legend items: (Text, Color, Value) - read from the current parameter snapshot
+        p = params.current()
+        if self.ui_manager.tabs:
+            p = p.for_species(self.ui_manager.tabs[self.ui_manager.panel][0]) # The species whose sliders are shown
         legend_items = [
-            ("Perception Radius", settings.WHITE, settings.PERCEPTION_RADIUS),
-            ("Separation Radius", settings.YELLOW, settings.SEPARATION_RADIUS),
-            ("Cohesion Weight", settings.RED, settings.COHESION_WEIGHT),
-            ("Alignment Weight", settings.GREEN, settings.ALIGNMENT_WEIGHT),
-            ("Separation Weight", settings.CYAN, settings.SEPARATION_WEIGHT),
-            ("Max Speed", settings.BLUE, settings.MAX_SPEED),
-            ("Max Force", settings.WHITE, settings.MAX_FORCE),
+            ("Perception Radius", settings.WHITE, p.perception_radius),
+            ("Separation Radius", settings.YELLOW, p.separation_radius),
+            ("Cohesion Weight", settings.RED, p.cohesion_weight),
+            ("Alignment Weight", settings.GREEN, p.alignment_weight),
+            ("Separation Weight", settings.CYAN, p.separation_weight),
+            ("Max Speed", settings.BLUE, p.max_speed),
+            ("Max Force", settings.WHITE, p.max_force),
+            ("Nearest Neighbours", settings.YELLOW, str(p.neighbour_count or "off")),
         ]
         
         
         # Draw the text and indicators on top of the transparent background
+        for i, (text, value) in enumerate(analytics_items):
+            text_surface = settings.FONT.render(f"{text}: {value}", True, settings.WHITE)
+            screen.blit(text_surface, (legend_x + 25, legend_y - 30 + i * line_height))
+        legend_y += len(analytics_items) * line_height
+
         for i, (text, color, value) in enumerate(legend_items):
             # Improved: Display text uses the specified color for clarity
-            display_text = f"{text}: {value:.1f}" # Format to one decimal place for consistency
+            display_text = f"{text}: {value}" if isinstance(value, str) else f"{text}: {value:.1f}" # One decimal place for consistency
             text_surface = settings.FONT.render(display_text, True, color)
             
             # Position the text relative to the top-left of the legend area
@@ -122,7 +346,38 @@ class Game:
             elif 2 <= i < 5:
                 pygame.draw.line(screen, color, (legend_x + 10, legend_y - 30 + 7 + i * line_height), (legend_x + 20, legend_y - 30 + 7 + i * line_height), 3)
             else:
-                pass # No indicator for Max Speed and Max Force
+                pass # No indicator for Max Speed, Max Force and the neighbour count
 if __name__ == "__main__":
-    game = Game()
+    import argparse
+    parser = argparse.ArgumentParser(description=settings.GAME_CAPTION)
+    parser.add_argument("--engine", choices=ENGINES, default=settings.SIMULATION_ENGINE,
+                        help="simulation engine: per-object Boid reference, batched NumPy Flock or parallel Flock")
+    parser.add_argument("--profile", action="store_true", help="collect per-phase frame timings from the start")
+    parser.add_argument("--profile-output", default=settings.PROFILE_OUTPUT,
+                        help="where the session timings are written (.json or .csv) on exit or F4")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the initial flock")
+    parser.add_argument("--record", default=None, help="record the run to this file for replay.py")
+    parser.add_argument("--export", default=None,
+                        help="write every rendered frame to a directory of PNGs, or a .rgb raw RGB24 stream")
+    parser.add_argument("--obstacles", default=settings.OBSTACLES_FILE,
+                        help="JSON file of obstacle polygons and walls for the boids to steer around")
+    parser.add_argument("--species", default=None,
+                        help="JSON file of species with their own parameters, looks and rules (e.g. predator_prey.json)")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation in a background thread, overlapping it with rendering")
+    parser.add_argument("--analytics", action="store_true", help="show live flock metrics from the start (F5 toggles)")
+    parser.add_argument("--analytics-output", default=None,
+                        help="write the per-tick flock metrics to this file (.csv or .json) on exit")
+    parser.add_argument("--governor", action="store_true", default=settings.QUALITY_GOVERNOR,
+                        help="lower the drawing and simulation quality as needed to hold the display rate (F6 toggles)")
+    args = parser.parse_args()
+    settings.OBSTACLES_FILE = args.obstacles
+    if args.species:
+        from species import use_species
+        use_species(args.species)
+
+    game = Game(engine=args.engine, profile=args.profile, profile_output=args.profile_output,
+                seed=args.seed, record=args.record, export=args.export,
+                analytics=args.analytics, analytics_output=args.analytics_output, threaded=args.threaded,
+                governor=args.governor)
     game.run()
@@ -0,0 +1,96 @@
+# metrics.py
+
+import numpy as np
+from flock import CHUNK_SIZE, partition
+
+def order_parameter(velocities):
+    """
+    Polarisation of the flock: the length of the mean heading, 1 when every boid
+    flies the same way and close to 0 when headings are random.
+    """
+    if len(velocities) == 0:
+        return 0.0
+    speeds = np.hypot(velocities[:, 0], velocities[:, 1])
+    headings = velocities / np.where(speeds > 0, speeds, 1.0)[:, None]
+    return float(np.hypot(*headings.mean(axis=0)))
+
+def neighbour_pairs(positions, radius):
+    """
+    Returns every pair of boids closer than radius as two index arrays (i < j),
+    using the same x-sorted sweep as the Flock engine.
+    """
+    order, chunks = partition(positions, radius)
+    sorted_positions = positions[order]
+    radius_sq = radius * radius
+    firsts, seconds = [], []
+    for start, stop, first, last in chunks:
+        # Each pair is found from both ends; keep it only from its lower sorted index
+        first = max(first, start)
+        dx = sorted_positions[start:stop, 0, None] - sorted_positions[None, first:last, 0]
+        dy = sorted_positions[start:stop, 1, None] - sorted_positions[None, first:last, 1]
+        rows, columns = np.nonzero(dx * dx + dy * dy < radius_sq)
+        rows += start
+        columns += first
+        keep = columns > rows
+        a, b = order[rows[keep]], order[columns[keep]]
+        firsts.append(np.minimum(a, b))
+        seconds.append(np.maximum(a, b))
+    if not firsts:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+def connected_components(count, firsts, seconds):
+    """
+    Union-find over an edge list, vectorised: every round hooks each root onto the
+    smallest root it is linked to, then compresses paths by pointer jumping.
+    :return: An array giving each boid the label (lowest member index) of its component.
+    """
+    parent = np.arange(count)
+    if len(firsts) == 0:
+        return parent
+    while True:
+        a, b = parent[firsts], parent[seconds]
+        if np.array_equal(a, b):
+            return parent
+        low, high = np.minimum(a, b), np.maximum(a, b)
+        np.minimum.at(parent, high, low)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+def nearest_neighbour_distances(positions):
+    """Returns the distance from every boid to its nearest other boid (exact, chunked)."""
+    count = len(positions)
+    distances = np.full(count, np.inf)
+    if count < 2:
+        return distances
+    for start in range(0, count, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, count)
+        dx = positions[start:stop, 0, None] - positions[None, :, 0]
+        dy = positions[start:stop, 1, None] - positions[None, :, 1]
+        distance_sq = dx * dx + dy * dy
+        distance_sq[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        distances[start:stop] = np.sqrt(distance_sq.min(axis=1))
+    return distances
+
+def flock_metrics(positions, velocities, radius):
+    """
+    Summarises the state of a flock.
+    :param radius: Boids closer than this belong to the same cluster (usually the perception radius).
+    :return: A dict with the polarisation, mean nearest-neighbour distance, cluster count
+             and size of the largest cluster.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    velocities = np.asarray(velocities, dtype=float).reshape(-1, 2)
+    labels = connected_components(len(positions), *neighbour_pairs(positions, radius))
+    sizes = np.bincount(labels)
+    sizes = sizes[sizes > 0]
+    nearest = nearest_neighbour_distances(positions)
+    return {
+        "polarisation": order_parameter(velocities),
+        "mean_nn_distance": float(nearest.mean()) if len(positions) > 1 else 0.0,
+        "clusters": len(sizes),
+        "largest_cluster": int(sizes.max()) if len(sizes) else 0,
+    }
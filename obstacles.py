@@ -0,0 +1,216 @@
+# obstacles.py
+
+import json
+import math
+import numpy as np
+import settings # Import settings as a module to access its attributes dynamically
+
+def load_obstacles(path, world_size, resolution=None):
+    """
+    Loads static obstacles from a JSON file of the form
+    {"polygons": [[[x, y], ...], ...], "lines": [[[x, y], ...], ...]}
+    where polygons are solid closed shapes and lines are open walls (polylines).
+    :return: An ObstacleField over the world.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return ObstacleField(data.get("polygons", []), data.get("lines", []), world_size, resolution)
+
+_loaded = {}
+
+def from_settings(world_size):
+    """Returns the field for settings.OBSTACLES_FILE (None if unset), loading each file only once."""
+    if not settings.OBSTACLES_FILE:
+        return None
+    key = (settings.OBSTACLES_FILE, tuple(world_size), settings.OBSTACLE_FIELD_RESOLUTION)
+    if key not in _loaded:
+        _loaded[key] = load_obstacles(settings.OBSTACLES_FILE, world_size)
+    return _loaded[key]
+
+class ObstacleField:
+    def __init__(self, polygons, lines, world_size, resolution=None, avoid_distance=None, weight=None):
+        """
+        Signed distance field of static obstacles, sampled on a regular grid once up front.
+        Boids then look up the distance to the nearest obstacle and the direction away
+        from it by bilinear interpolation, in constant time however many segments there are.
+        Distances are negative inside polygons, so boids that end up inside are pushed out.
+        :param polygons: Closed polygons, each a list of (x, y) vertices.
+        :param lines: Open polylines, each a list of (x, y) points.
+        :param world_size: (width, height) of the world.
+        :param resolution: Grid spacing in world units, defaults to settings.OBSTACLE_FIELD_RESOLUTION.
+        :param avoid_distance: Boids start steering away within this distance, defaults to
+                               settings.OBSTACLE_AVOID_DISTANCE.
+        :param weight: Weight of the avoidance force, defaults to settings.OBSTACLE_WEIGHT.
+        """
+        self.polygons = [np.asarray(polygon, dtype=float).reshape(-1, 2) for polygon in polygons]
+        self.lines = [np.asarray(line, dtype=float).reshape(-1, 2) for line in lines]
+        self.world_size = tuple(world_size)
+        self.resolution = resolution or settings.OBSTACLE_FIELD_RESOLUTION
+        self.avoid_distance = avoid_distance or settings.OBSTACLE_AVOID_DISTANCE
+        self.weight = settings.OBSTACLE_WEIGHT if weight is None else weight
+
+        segments = [np.hstack((polygon, np.roll(polygon, -1, axis=0))) for polygon in self.polygons]
+        segments += [np.hstack((line[:-1], line[1:])) for line in self.lines if len(line) > 1]
+        self.segments = np.vstack(segments) if segments else np.zeros((0, 4))
+
+        self.cols = int(math.ceil(self.world_size[0] / self.resolution)) + 1
+        self.rows = int(math.ceil(self.world_size[1] / self.resolution)) + 1
+        self.distance = self._distance_grid()
+        # np.gradient returns the derivative along rows (y) first
+        self.gradient_y, self.gradient_x = np.gradient(self.distance, self.resolution)
+
+        self._background = None
+        self._background_key = None
+
+    def _distance_grid(self):
+        """
+        Distance from every grid point to the nearest segment, clamped a little beyond
+        avoid_distance outside obstacles but exact (and negative) inside polygons, so the
+        field slopes towards the nearest edge however deep inside a boid ends up.
+        """
+        # Far points only need to know they are far, so each segment only updates its neighbourhood
+        far = self.avoid_distance + 2 * self.resolution
+        distance = np.full((self.rows, self.cols), float(far))
+        reach = int(math.ceil(far / self.resolution))
+        for ax, ay, bx, by in self.segments.tolist():
+            col_slice = self._span(min(ax, bx), max(ax, bx), reach, self.cols)
+            row_slice = self._span(min(ay, by), max(ay, by), reach, self.rows)
+            px = (np.arange(col_slice.start, col_slice.stop) * self.resolution)[None, :]
+            py = (np.arange(row_slice.start, row_slice.stop) * self.resolution)[:, None]
+            dx, dy = bx - ax, by - ay
+            length_sq = dx * dx + dy * dy
+            t = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0, 1) if length_sq > 0 else 0.0
+            nearest = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+            np.minimum(distance[row_slice, col_slice], nearest, out=distance[row_slice, col_slice])
+
+        # Even-odd ray casting over each polygon's bounding box flips the sign inside it
+        for polygon in self.polygons:
+            col_slice = self._span(polygon[:, 0].min(), polygon[:, 0].max(), 0, self.cols)
+            row_slice = self._span(polygon[:, 1].min(), polygon[:, 1].max(), 0, self.rows)
+            px = (np.arange(col_slice.start, col_slice.stop) * self.resolution)[None, :]
+            py = (np.arange(row_slice.start, row_slice.stop) * self.resolution)[:, None]
+            inside = np.zeros((len(py), px.shape[1]), dtype=bool)
+            for (ax, ay), (bx, by) in zip(polygon.tolist(), np.roll(polygon, -1, axis=0).tolist()):
+                if ay == by:
+                    continue
+                crosses = (ay > py) != (by > py)
+                inside ^= crosses & (px < (bx - ax) * (py - ay) / (by - ay) + ax)
+            window = distance[row_slice, col_slice]
+            # Points deeper than the clamp were never reached by the segment pass above
+            deep = inside & (window >= far)
+            if deep.any():
+                rows, cols = np.nonzero(deep)
+                points = np.column_stack((px[0, cols], py[rows, 0]))
+                window[deep] = self._nearest_distance(points)
+            window[inside] = -window[inside]
+        return distance
+
+    def _nearest_distance(self, points):
+        """Exact distance from each of N x 2 points to the nearest segment."""
+        a, b = self.segments[:, 0:2], self.segments[:, 2:4]
+        ab = b - a
+        length_sq = np.maximum((ab * ab).sum(axis=1), 1e-12)
+        nearest = np.empty(len(points))
+        for start in range(0, len(points), 1024): # Bounds the points x segments temporaries
+            ap = points[start:start + 1024, None, :] - a[None, :, :]
+            t = np.clip((ap * ab[None]).sum(axis=2) / length_sq, 0, 1)
+            offset = ap - t[:, :, None] * ab[None]
+            nearest[start:start + 1024] = np.hypot(offset[:, :, 0], offset[:, :, 1]).min(axis=1)
+        return nearest
+
+    def _span(self, low, high, margin, count):
+        return slice(max(0, int(math.floor(low / self.resolution)) - margin),
+                     min(count, int(math.ceil(high / self.resolution)) + margin + 1))
+
+    def sample(self, positions):
+        """
+        Bilinearly interpolates the field at N x 2 positions.
+        :return: (distance, gradient) as an N array and an N x 2 array.
+        """
+        gx = np.clip(positions[:, 0] / self.resolution, 0, self.cols - 1)
+        gy = np.clip(positions[:, 1] / self.resolution, 0, self.rows - 1)
+        col = np.minimum(gx.astype(int), self.cols - 2)
+        row = np.minimum(gy.astype(int), self.rows - 2)
+        fx, fy = gx - col, gy - row
+
+        def interpolate(grid):
+            top = grid[row, col] * (1 - fx) + grid[row, col + 1] * fx
+            bottom = grid[row + 1, col] * (1 - fx) + grid[row + 1, col + 1] * fx
+            return top * (1 - fy) + bottom * fy
+
+        return interpolate(self.distance), np.column_stack((interpolate(self.gradient_x), interpolate(self.gradient_y)))
+
+    def sample_one(self, x, y):
+        """Scalar version of sample for a single position: returns (distance, gradient_x, gradient_y)."""
+        gx = min(max(x / self.resolution, 0), self.cols - 1)
+        gy = min(max(y / self.resolution, 0), self.rows - 1)
+        col = min(int(gx), self.cols - 2)
+        row = min(int(gy), self.rows - 2)
+        fx, fy = gx - col, gy - row
+
+        def interpolate(grid):
+            top = grid[row, col] * (1 - fx) + grid[row, col + 1] * fx
+            bottom = grid[row + 1, col] * (1 - fx) + grid[row + 1, col + 1] * fx
+            return float(top * (1 - fy) + bottom * fy)
+
+        return interpolate(self.distance), interpolate(self.gradient_x), interpolate(self.gradient_y)
+
+    def steer(self, positions, velocities, max_speed, max_force):
+        """
+        Weighted avoidance force for N boids: steer along the distance gradient, away from
+        the nearest obstacle, with full strength at contact fading to zero at avoid_distance.
+        """
+        distance, gradient = self.sample(positions)
+        urgency = np.clip(1 - distance / self.avoid_distance, 0, 1)
+        lengths = np.hypot(gradient[:, 0], gradient[:, 1])
+        active = (urgency > 0) & (lengths > 0)
+        desired = gradient / np.where(lengths > 0, lengths, 1.0)[:, None] * max_speed
+        steer = desired - velocities
+        steer_lengths = np.hypot(steer[:, 0], steer[:, 1])
+        steer *= np.where(steer_lengths > max_force, max_force / np.where(steer_lengths > 0, steer_lengths, 1.0), 1.0)[:, None]
+        steer[~active] = 0
+        return steer * (urgency * self.weight)[:, None]
+
+    def steer_one(self, position, velocity, max_speed, max_force):
+        """Scalar version of steer for one Boid; returns a pygame Vector2."""
+        import pygame
+        distance, gradient_x, gradient_y = self.sample_one(position.x, position.y)
+        urgency = min(max(1 - distance / self.avoid_distance, 0), 1)
+        gradient = pygame.math.Vector2(gradient_x, gradient_y)
+        if urgency == 0 or gradient.length() == 0:
+            return pygame.math.Vector2(0, 0)
+        steer = gradient.normalize() * max_speed - velocity
+        if steer.length() > max_force:
+            steer.scale_to_length(max_force)
+        return steer * (urgency * self.weight)
+
+    def draw(self, screen, camera=None, scale=1.0):
+        """
+        Fills the screen with the obstacle layer. The geometry is rendered once into a cached
+        background and re-rendered only when the camera view changes, so a frame costs one blit.
+        :param scale: Screen pixels per world unit when there is no camera (e.g. exported frames).
+        """
+        if camera is None or camera.is_identity():
+            camera, key = None, ("scale", scale)
+        else:
+            key = ("camera", camera.level, camera.visible_rect())
+        if self._background is None or key != self._background_key or self._background.get_size() != screen.get_size():
+            self._background = self._render(screen.get_size(), camera, scale)
+            self._background_key = key
+        screen.blit(self._background, (0, 0))
+
+    def _render(self, size, camera, scale=1.0):
+        import pygame
+        background = pygame.Surface(size).convert() if pygame.display.get_surface() else pygame.Surface(size)
+        background.fill(settings.BLACK)
+        transform = (lambda points: points * scale) if camera is None else camera.to_screen
+        width = max(1, int(round(2 * (scale if camera is None else camera.zoom))))
+        for polygon in self.polygons:
+            points = transform(polygon).tolist()
+            if len(points) >= 3:
+                pygame.draw.polygon(background, settings.OBSTACLE_COLOR, points)
+        for line in self.lines:
+            points = transform(line).tolist()
+            if len(points) >= 2:
+                pygame.draw.lines(background, settings.OBSTACLE_COLOR, False, points, width)
+        return background
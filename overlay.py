@@ -0,0 +1,39 @@
+# overlay.py
+
+import pygame
+
+class OverlayCache:
+    def __init__(self, size):
+        """
+        Caches UI drawn on top of the scene in a transparent surface that is only
+        re-rendered when its state key changes, and otherwise blitted once per frame.
+        :param size: (width, height) of the overlay, normally the screen size.
+        """
+        self.size = tuple(size)
+        self.surface = None
+        self.key = None
+        self.rebuilds = 0
+
+    def invalidate(self):
+        """Forces a re-render on the next draw."""
+        self.key = None
+
+    def _rebuild(self, key, render):
+        surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        render(surface)
+        # Run-length encode the mostly transparent surface so blitting it skips
+        # the empty middle of the screen instead of blending every pixel
+        surface.set_alpha(255, pygame.RLEACCEL)
+        self.surface = surface
+        self.key = key
+        self.rebuilds += 1
+
+    def draw(self, screen, key, render):
+        """
+        Blits the overlay, re-rendering it first if key differs from the last one.
+        :param key: Hashable snapshot of everything the overlay shows.
+        :param render: Callable drawing the overlay onto the surface it is given.
+        """
+        if key != self.key:
+            self._rebuild(key, render)
+        screen.blit(self.surface, (0, 0))
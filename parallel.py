@@ -0,0 +1,116 @@
+# parallel.py
+
+import multiprocessing
+import os
+import numpy as np
+import settings # Import settings as a module to access its attributes dynamically
+from flock import Flock, SUM_COLUMNS, chunk_sums, partition
+
+# Shared buffers as seen from inside a worker process, set up by _init_worker
+_shared = {}
+
+def _init_worker(states, order, sums, capacity):
+    """Wraps the shared buffers in NumPy views once per worker process."""
+    _shared["states"] = [np.frombuffer(buffer, dtype=np.float64).reshape(capacity, 4) for buffer in states]
+    _shared["order"] = np.frombuffer(order, dtype=np.int64)
+    _shared["sums"] = np.frombuffer(sums, dtype=np.float64).reshape(capacity, SUM_COLUMNS)
+
+def _run_task(task):
+    """
+    Computes the neighbour sums for a run of chunks, reading the front state buffer.
+    :return: The neighbour pairs found, in sorted indices, when the task asks for them.
+    """
+    front, chunks, perception_sq, separation_sq, track_pairs = task
+    state = _shared["states"][front]
+    order = _shared["order"]
+    sums = _shared["sums"]
+    pairs = [] if track_pairs else None
+    for start, stop, first, last in chunks:
+        sums[start:stop] = chunk_sums(state[order[start:stop]], state[order[first:last]],
+                                      start - first, perception_sq, separation_sq, pairs)
+        if pairs is not None:
+            rows, columns = pairs.pop()
+            pairs.append((rows + start, columns + first))
+    return pairs
+
+class ParallelFlock(Flock):
+    def __init__(self, count, rng=None, workers=None, min_boids=None):
+        """
+        Flock engine that spreads the neighbour pass over a pool of worker processes.
+        The x-sorted chunks of Flock are the spatial partitions and their candidate
+        runs the halos; workers read one of two shared state buffers while the next
+        tick's state is written to the other, so every tick sees a consistent state
+        and the result is identical to the serial Flock update.
+        :param count: Number of boids.
+        :param rng: Optional numpy Generator, for reproducible flocks.
+        :param workers: Worker processes, defaults to settings.PARALLEL_WORKERS (0 = all cores).
+        :param min_boids: Below this many boids the serial update is used instead.
+        """
+        super().__init__(count, rng)
+        workers = settings.PARALLEL_WORKERS if workers is None else workers
+        self.workers = workers or os.cpu_count() or 1
+        min_boids = settings.PARALLEL_MIN_BOIDS if min_boids is None else min_boids
+        self.pool = None
+
+        # Serial fallback: for small flocks the IPC costs more than it saves
+        if self.workers < 2 or count < min_boids:
+            return
+
+        self._states = [multiprocessing.RawArray("d", count * 4) for _ in range(2)]
+        self._order = multiprocessing.RawArray("q", count)
+        self._sums = multiprocessing.RawArray("d", count * SUM_COLUMNS)
+        self._state_views = [np.frombuffer(buffer, dtype=np.float64).reshape(count, 4) for buffer in self._states]
+        self._order_view = np.frombuffer(self._order, dtype=np.int64)
+        self._sums_view = np.frombuffer(self._sums, dtype=np.float64).reshape(count, SUM_COLUMNS)
+
+        self._front = 0
+        self._state_views[0][:, 0:2] = self.positions
+        self._state_views[0][:, 2:4] = self.velocities
+        self._store_views()
+
+        self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                         initargs=(self._states, self._order, self._sums, count))
+
+    def _store_views(self):
+        """Points positions/velocities at the front state buffer."""
+        front = self._state_views[self._front]
+        self.positions = front[:, 0:2]
+        self.velocities = front[:, 2:4]
+
+    def _neighbour_sums(self, perception_sq, separation_sq, reach):
+        if self.pool is None:
+            return super()._neighbour_sums(perception_sq, separation_sq, reach)
+
+        order, chunks = partition(self.positions, reach)
+        self._order_view[:] = order
+        self.neighbour_checks = sum((stop - start) * (last - first) for start, stop, first, last in chunks)
+
+        # A few tasks per worker keeps the load balanced when the flock clusters
+        task_count = min(len(chunks), self.workers * 4)
+        bounds = np.linspace(0, len(chunks), task_count + 1).astype(int)
+        tasks = [(self._front, chunks[bounds[i]:bounds[i + 1]], perception_sq, separation_sq, self.track_pairs)
+                 for i in range(task_count)]
+        results = self.pool.map(_run_task, tasks)
+        self._keep_pairs(order, [pair for pairs in results for pair in pairs] if self.track_pairs else None)
+
+        sums = np.empty_like(self._sums_view)
+        sums[order] = self._sums_view
+        return sums
+
+    def _store(self, positions, velocities):
+        if self.pool is None:
+            super()._store(positions, velocities)
+            return
+
+        # Write the next tick into the back buffer, then swap it to the front
+        back = self._state_views[1 - self._front]
+        back[:, 0:2] = positions
+        back[:, 2:4] = velocities
+        self._front = 1 - self._front
+        self._store_views()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
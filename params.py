@@ -0,0 +1,136 @@
+# params.py
+
+from collections import namedtuple
+import settings # Import settings as a module to access its attributes dynamically
+
+# Setting names (as used by PARAM_RANGES and the sliders) -> SimulationParams fields
+SETTING_FIELDS = {
+    "PERCEPTION_RADIUS": "perception_radius",
+    "SEPARATION_RADIUS": "separation_radius",
+    "COHESION_WEIGHT": "cohesion_weight",
+    "ALIGNMENT_WEIGHT": "alignment_weight",
+    "SEPARATION_WEIGHT": "separation_weight",
+    "MAX_SPEED": "max_speed",
+    "MAX_FORCE": "max_force",
+    "NEIGHBOUR_COUNT": "neighbour_count",
+    "AVOID_WEIGHT": "avoid_weight",
+    "CHASE_WEIGHT": "chase_weight",
+}
+
+_BASE_FIELDS = ["version"] + list(SETTING_FIELDS.values()) + [
+    "world_width",
+    "world_height",
+    "species", # ((name, snapshot), ...) of every species in settings.SPECIES, in order
+]
+_DERIVED_FIELDS = [
+    "perception_radius_sq", # Squared radii for the distance tests in the pair loops
+    "separation_radius_sq",
+    "reach", # Largest interaction radius
+    "cell_size", # Minimum spatial grid cell size: reach plus what two boids close in one tick
+    "perception_limited", # Topological neighbours must also be within the perception radius (see capped)
+]
+
+class SimulationParams(namedtuple("SimulationParams", _BASE_FIELDS + _DERIVED_FIELDS)):
+    """
+    Immutable snapshot of the simulation parameters plus values derived from them.
+    Every change produces a new snapshot with a higher version, so caches built from
+    parameters (spatial indexes, sprite atlases, overlays) only need to compare versions.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, version, species=(), **values):
+        reach = max(values["perception_radius"], values["separation_radius"])
+        values["neighbour_count"] = int(round(values["neighbour_count"])) # Sliders move in float steps
+        return cls(
+            version=version,
+            perception_radius_sq=values["perception_radius"] ** 2,
+            separation_radius_sq=values["separation_radius"] ** 2,
+            reach=reach,
+            cell_size=reach + 2 * values["max_speed"],
+            perception_limited=False,
+            species=tuple(species),
+            **values
+        )
+
+    def changed(self, **changes):
+        """
+        Returns the next version with some setting names (e.g. PERCEPTION_RADIUS=100) changed.
+        A species' own parameters are named after it, e.g. predator.MAX_SPEED=4.
+        """
+        values = {field: getattr(self, field) for field in _BASE_FIELDS if field != "version"}
+        species = dict(values.pop("species"))
+        for name, value in changes.items():
+            species_name, dot, setting = name.rpartition(".")
+            if dot:
+                species[species_name] = species[species_name].changed(**{setting: value})
+            else:
+                values[SETTING_FIELDS.get(name, name)] = value
+        version = self.version + 1
+        # Species snapshots share their parent's version, so version checks cover them too
+        species = tuple((name, snapshot._replace(version=version)) for name, snapshot in species.items())
+        return SimulationParams.create(version, species, **values)
+
+    def as_settings(self):
+        """Returns the slider parameters keyed by their setting names, including every species' own."""
+        values = {name: getattr(self, field) for name, field in SETTING_FIELDS.items()}
+        for species_name, snapshot in self.species:
+            values.update((f"{species_name}.{name}", getattr(snapshot, field)) for name, field in SETTING_FIELDS.items())
+        return values
+
+    def for_species(self, name):
+        """Returns the parameters of one species, or these ones when there is no such species."""
+        return dict(self.species).get(name, self)
+
+    def capped(self, neighbour_count):
+        """
+        Returns a snapshot in which every species reacts to at most neighbour_count nearest
+        neighbours, whatever the sliders say. A species in metric mode keeps its perception
+        radius: its neighbours are the nearest ones within it, so the cap bounds the work
+        without reaching out to distant boids.
+        """
+        def cap(snapshot):
+            if 0 < snapshot.neighbour_count <= neighbour_count:
+                return snapshot
+            return snapshot._replace(neighbour_count=neighbour_count,
+                                     perception_limited=snapshot.neighbour_count == 0)
+        return cap(self)._replace(species=tuple((name, cap(snapshot)) for name, snapshot in self.species))
+
+def from_settings(version=0):
+    """Builds a snapshot from the values in the settings module."""
+    values = {field: getattr(settings, name) for name, field in SETTING_FIELDS.items()}
+    values.update(world_width=settings.WORLD_WIDTH, world_height=settings.WORLD_HEIGHT)
+    species = []
+    for spec in settings.SPECIES:
+        # A species starts from the global settings with its own "params" laid over them
+        overrides = {}
+        for name, value in spec.get("params", {}).items():
+            if name not in SETTING_FIELDS:
+                raise ValueError(f"Unknown parameter {name} for species {spec['name']}")
+            overrides[SETTING_FIELDS[name]] = value
+        species.append((spec["name"], SimulationParams.create(version, **dict(values, **overrides))))
+    return SimulationParams.create(version, species, **values)
+
+_current = None
+
+def current():
+    """Returns the latest published snapshot. Take it once per tick and pass it down."""
+    global _current
+    if _current is None:
+        _current = from_settings()
+    return _current
+
+def publish(**changes):
+    """
+    Publishes a new snapshot with some parameters changed, keyed by setting name
+    (e.g. publish(PERCEPTION_RADIUS=100)). Readers holding the old snapshot are unaffected.
+    """
+    global _current
+    _current = current().changed(**changes)
+    return _current
+
+def reload():
+    """Publishes a new snapshot re-read from the settings module (e.g. after overriding settings)."""
+    global _current
+    _current = from_settings(current().version + 1)
+    return _current
@@ -0,0 +1,155 @@
+# pipeline.py
+
+import queue
+import threading
+import time
+import numpy as np
+import params
+import settings # Import settings as a module to access its attributes dynamically
+
+class SimulationThread(threading.Thread):
+    def __init__(self, simulation, tick_rate=None, paused=False):
+        """
+        Runs a Simulation on its own fixed-timestep clock in a background thread, so the
+        main thread can render while the next tick is computed. After every tick the state
+        is written to the back one of two buffers, which then becomes the front; the main
+        thread only ever reads the front (latest completed) buffer.
+        Everything that changes the simulation (sliders, reset, speed, pause) is handed
+        over through a queue and applied between ticks, never in the middle of one.
+        :param simulation: The Simulation to advance; only this thread touches it once started.
+        :param tick_rate: Simulation ticks per second, defaults to settings.DEFAULT_TICK_RATE.
+        """
+        super().__init__(daemon=True)
+        self.simulation = simulation
+        self.tick_rate = tick_rate or settings.DEFAULT_TICK_RATE
+        self.paused = paused
+        self.commands = queue.Queue()
+        self.error = None
+
+        self._lock = threading.Lock()
+        self._buffers = [None, None]
+        self._front = 0
+        self._tick = 0
+        self._update_ms = 0.0 # Time spent in Simulation.update since the last take_timings
+        self._neighbour_checks = 0 # Pairs examined since the last take_timings
+        self._write_state()
+        self.start()
+
+    def publish(self, **changes):
+        """Queues a parameter change, applied with params.publish before the next tick (UIManager.publish hook)."""
+        self.commands.put(("params", changes))
+
+    def set_tick_rate(self, tick_rate):
+        self.commands.put(("tick_rate", tick_rate))
+
+    def set_paused(self, paused):
+        self.commands.put(("paused", paused))
+
+    def reset(self):
+        self.commands.put(("reset", None))
+
+    def set_neighbour_cap(self, cap):
+        self.commands.put(("neighbour_cap", cap))
+
+    def record_event(self, name, value=None):
+        """
+        Queues Recorder.record_event behind the parameter change it notes, so the event is
+        stamped with the tick the change takes effect at, and only this thread writes to the recorder.
+        """
+        self.commands.put(("record_event", (name, value)))
+
+    def set_analytics(self, analytics):
+        """Queues Simulation.set_analytics, so the engine never switches pair tracking mid-tick."""
+        self.commands.put(("analytics", analytics))
+
+    def latest(self):
+        """Returns (positions, velocities, tick) of the latest completed tick, as copies."""
+        if self.error is not None:
+            raise RuntimeError(f"Simulation thread failed: {self.error}")
+        with self._lock:
+            state = self._buffers[self._front]
+            return state[:, 0:2].copy(), state[:, 2:4].copy(), self._tick
+
+    def take_timings(self):
+        """
+        Returns (milliseconds spent in Simulation.update, neighbour pairs examined), summed
+        over the ticks completed since the last call, for the main thread's profiler.
+        """
+        with self._lock:
+            timings = (self._update_ms, self._neighbour_checks)
+            self._update_ms, self._neighbour_checks = 0.0, 0
+        return timings
+
+    def _write_state(self, update_ms=None):
+        """
+        Writes the simulation state into the back buffer and swaps it to the front.
+        :param update_ms: How long the tick just completed took, if any.
+        """
+        positions, velocities = self.simulation.state()
+        back = 1 - self._front
+        state = self._buffers[back]
+        if state is None or len(state) != len(positions):
+            state = self._buffers[back] = np.empty((len(positions), 4))
+        # The front buffer may be being copied by the main thread, the back one never is
+        state[:, 0:2] = positions
+        state[:, 2:4] = velocities
+        with self._lock:
+            self._front = back
+            self._tick = self.simulation.tick
+            if update_ms is not None:
+                self._update_ms += update_ms
+                self._neighbour_checks += self.simulation.neighbour_checks
+
+    def _apply(self, command, value):
+        if command == "params":
+            params.publish(**value)
+        elif command == "tick_rate":
+            self.tick_rate = value
+        elif command == "paused":
+            self.paused = value
+        elif command == "reset":
+            self.simulation.reset()
+            self._write_state()
+        elif command == "analytics":
+            self.simulation.set_analytics(value)
+        elif command == "neighbour_cap":
+            self.simulation.neighbour_cap = value
+        elif command == "record_event":
+            if self.simulation.recorder is not None:
+                self.simulation.recorder.record_event(*value)
+
+    def run(self):
+        try:
+            next_tick = time.perf_counter()
+            while True:
+                # Sleep until the next tick is due by waiting on the command queue,
+                # so changes are picked up immediately
+                timeout = None if self.paused else max(0.0, next_tick - time.perf_counter())
+                try:
+                    command, value = self.commands.get(timeout=timeout)
+                except queue.Empty:
+                    command = None
+                if command == "stop":
+                    return
+                if command is not None:
+                    self._apply(command, value)
+                    if command not in ("params", "neighbour_cap", "record_event"):
+                        # Restart the clock, as Game does, so no backlog of ticks is run
+                        next_tick = time.perf_counter()
+                    continue
+
+                start = time.perf_counter()
+                self.simulation.update()
+                self._write_state((time.perf_counter() - start) * 1000)
+                next_tick += 1.0 / self.tick_rate
+                now = time.perf_counter()
+                if next_tick < now - settings.MAX_TICKS_PER_FRAME / self.tick_rate:
+                    # Falling behind: drop the backlog rather than spiral
+                    next_tick = now
+        except Exception as e:
+            self.error = e
+
+    def close(self):
+        """Stops the thread after the tick in progress; the simulation is left to its owner to close."""
+        self.commands.put(("stop", None))
+        self.join()
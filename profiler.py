@@ -0,0 +1,130 @@
+# profiler.py
+
+import csv
+import json
+import time
+from collections import deque
+import pygame
+import settings # Import settings as a module to access its attributes dynamically
+
+class _Section:
+    """Context manager adding the time spent inside it to a phase of the current frame."""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+class _NullSection:
+    """Shared no-op section returned while profiling is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SECTION = _NullSection()
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class Profiler:
+    def __init__(self, enabled=False, window=None):
+        """
+        Per-phase frame timing. Phases are timed with `with profiler.section(name):`,
+        which costs a single attribute check while the profiler is disabled.
+        :param enabled: Whether timings are collected.
+        :param window: Number of recent frames kept for the rolling statistics.
+        """
+        self.enabled = enabled
+        self.window = window or settings.PROFILER_WINDOW
+        self.history = {} # phase -> deque of per-frame milliseconds
+        self.session = [] # One dict per profiled frame, for dumping
+        self._frame = {}
+        self._frame_start = None
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def add(self, name, value):
+        """Adds value (milliseconds, or a count) to a phase of the current frame."""
+        if self.enabled:
+            self._frame[name] = self._frame.get(name, 0) + value
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame = {}
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Closes the current frame, recording its total time and phase totals."""
+        if not self.enabled or self._frame_start is None:
+            return
+        self._frame["frame"] = (time.perf_counter() - self._frame_start) * 1000
+        for name, value in self._frame.items():
+            self.history.setdefault(name, deque(maxlen=self.window)).append(value)
+        self.session.append(dict(self._frame, index=len(self.session)))
+        self._frame_start = None
+
+    def stats(self):
+        """Returns {phase: {mean, p50, p95, p99}} over the rolling window."""
+        result = {}
+        for name, values in self.history.items():
+            ordered = sorted(values)
+            result[name] = {
+                "mean": sum(ordered) / len(ordered),
+                "p50": _percentile(ordered, 0.50),
+                "p95": _percentile(ordered, 0.95),
+                "p99": _percentile(ordered, 0.99),
+            }
+        return result
+
+    def dump(self, path):
+        """Writes every profiled frame of the session as CSV (.csv) or JSON (anything else)."""
+        columns = ["index", "frame"] + sorted({k for frame in self.session for k in frame} - {"index", "frame"})
+        with open(path, "w", newline="") as f:
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(f, fieldnames=columns, restval=0)
+                writer.writeheader()
+                writer.writerows(self.session)
+            else:
+                json.dump({"stats": self.stats(), "frames": self.session}, f, indent=2)
+
+    def draw_graph(self, screen, rect):
+        """Draws the recent frame times as a line graph, with the display frame budget marked."""
+        rect = pygame.Rect(rect)
+        frames = list(self.history.get("frame", ()))
+        background = pygame.Surface(rect.size, pygame.SRCALPHA)
+        background.fill((30, 30, 30, 180))
+        screen.blit(background, rect.topleft)
+        if len(frames) < 2:
+            return
+
+        budget = 1000.0 / settings.DISPLAY_FPS
+        scale = rect.height / max(2 * budget, max(frames))
+        budget_y = rect.bottom - budget * scale
+        pygame.draw.line(screen, settings.YELLOW, (rect.left, budget_y), (rect.right, budget_y), 1)
+
+        step = rect.width / (self.window - 1)
+        points = [(rect.left + i * step, rect.bottom - value * scale) for i, value in enumerate(frames)]
+        pygame.draw.lines(screen, settings.GREEN, False, points, 1)
+
+        if settings.FONT:
+            frame_stats = self.stats()["frame"]
+            text = f"frame p50 {frame_stats['p50']:.1f} ms  p99 {frame_stats['p99']:.1f} ms"
+            screen.blit(settings.FONT.render(text, True, settings.WHITE), (rect.left + 5, rect.top + 5))
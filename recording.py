@@ -0,0 +1,198 @@
+# recording.py
+
+import json
+import struct
+import zlib
+import numpy as np
+import params
+import settings # Import settings as a module to access its attributes dynamically
+
+# File layout:
+#   header   HEADER_FORMAT: magic, version, boid count, ticks per chunk, seed, world size, encoding
+#   chunks   chunk_ticks ticks each (the last one may hold fewer), each a CHUNK_FORMAT header
+#            (ticks, byte length) followed by the (ticks x boid count x 4) float32 (x, y, vx, vy)
+#            frames, either raw (memory-mapped on replay) or, with ENCODING_DELTA, as the
+#            wrapping differences of the frames' 32-bit patterns from the previous frame in
+#            the chunk, zlib-compressed; every chunk decodes on its own, so seeking stays cheap
+#   metadata UTF-8 JSON: tick count, chunk offsets, initial parameters and parameter change events
+#   footer   FOOTER_FORMAT: metadata offset, end magic
+MAGIC = b"FLOIDREC"
+END_MAGIC = b"FLOIDEND"
+VERSION = 2
+HEADER_FORMAT = "<8sIIIqffI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CHUNK_FORMAT = "<II"
+CHUNK_HEADER_SIZE = struct.calcsize(CHUNK_FORMAT)
+FOOTER_FORMAT = "<Q8s"
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+NO_SEED = -1
+ENCODING_RAW = 0
+ENCODING_DELTA = 1
+
+def _delta_encode(frames):
+    """Lossless: each frame's float32 bit patterns minus the previous frame's, wrapping, then zlib."""
+    bits = frames.view(np.uint32)
+    deltas = bits.copy()
+    deltas[1:] -= bits[:-1]
+    return zlib.compress(deltas.tobytes(), settings.RECORD_COMPRESSION_LEVEL)
+
+def _delta_decode(data, shape):
+    deltas = np.frombuffer(zlib.decompress(data), dtype=np.uint32).reshape(shape)
+    return np.cumsum(deltas, axis=0, dtype=np.uint32).view(np.float32)
+
+def current_params():
+    """Returns the current value of every slider-controlled setting."""
+    return params.current().as_settings()
+
+class Recorder:
+    def __init__(self, path, boid_count, seed=None, chunk_ticks=None, compress=None):
+        """
+        Writes a run to a compact binary file, one chunk of chunk_ticks frames at a time.
+        :param path: Output file.
+        :param boid_count: Number of boids in every frame.
+        :param seed: Seed the run was started with, if any.
+        :param chunk_ticks: Frames per chunk, defaults to settings.RECORD_CHUNK_TICKS.
+        :param compress: Delta-encode and compress every chunk, defaults to settings.RECORD_COMPRESS.
+        """
+        self.path = path
+        self.boid_count = boid_count
+        self.chunk_ticks = chunk_ticks or settings.RECORD_CHUNK_TICKS
+        self.encoding = ENCODING_DELTA if (settings.RECORD_COMPRESS if compress is None else compress) else ENCODING_RAW
+        self.ticks = 0
+        self.events = []
+        self.chunk_offsets = []
+        self.initial_params = current_params()
+        self._chunk = np.empty((self.chunk_ticks, boid_count, 4), dtype=np.float32)
+        self._buffered = 0
+
+        self._file = open(path, "wb")
+        self._file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, boid_count, self.chunk_ticks,
+                                     NO_SEED if seed is None else seed,
+                                     params.current().world_width, params.current().world_height, self.encoding))
+
+    def record(self, positions, velocities):
+        """Appends one tick of boid state."""
+        frame = self._chunk[self._buffered]
+        frame[:, 0:2] = positions
+        frame[:, 2:4] = velocities
+        self._buffered += 1
+        self.ticks += 1
+        if self._buffered == self.chunk_ticks:
+            self._flush()
+
+    def record_event(self, name, value=None):
+        """Notes a parameter change (or another event such as a reset) at the current tick."""
+        self.events.append({"tick": self.ticks, "name": name, "value": value})
+
+    def _flush(self):
+        if self._buffered == 0:
+            return
+        frames = self._chunk[:self._buffered]
+        data = _delta_encode(frames) if self.encoding == ENCODING_DELTA else frames.tobytes()
+        self.chunk_offsets.append(self._file.tell())
+        self._file.write(struct.pack(CHUNK_FORMAT, self._buffered, len(data)))
+        self._file.write(data)
+        self._buffered = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        self._flush()
+        metadata_offset = self._file.tell()
+        metadata = {"ticks": self.ticks, "chunks": self.chunk_offsets,
+                    "initial_params": self.initial_params, "events": self.events}
+        self._file.write(json.dumps(metadata).encode("utf-8"))
+        self._file.write(struct.pack(FOOTER_FORMAT, metadata_offset, END_MAGIC))
+        self._file.close()
+        self._file = None
+
+class Replay:
+    def __init__(self, path):
+        """
+        Memory-maps a recording so any tick can be read in constant time without re-simulating:
+        raw chunks are read in place and a compressed one only decodes the chunk holding the tick.
+        A file whose writer never closed it (no footer) is still readable up to its last full chunk.
+        """
+        with open(path, "rb") as f:
+            magic, version, self.boid_count, self.chunk_ticks, seed, width, height, self.encoding = \
+                struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a boids recording")
+            if version != VERSION:
+                raise ValueError(f"Unsupported recording version {version}")
+            self.seed = None if seed == NO_SEED else seed
+            self.world_size = (width, height)
+
+            f.seek(0, 2)
+            size = f.tell()
+            metadata = {}
+            if size >= HEADER_SIZE + FOOTER_SIZE:
+                f.seek(size - FOOTER_SIZE)
+                metadata_offset, end_magic = struct.unpack(FOOTER_FORMAT, f.read(FOOTER_SIZE))
+                if end_magic == END_MAGIC:
+                    f.seek(metadata_offset)
+                    metadata = json.loads(f.read(size - FOOTER_SIZE - metadata_offset).decode("utf-8"))
+            if "chunks" in metadata:
+                offsets, ticks = metadata["chunks"], metadata["ticks"]
+            else:
+                offsets, ticks = self._scan_chunks(f, size)
+
+        self.initial_params = metadata.get("initial_params", {})
+        self.events = metadata.get("events", [])
+        self.ticks = ticks
+        self._data = np.memmap(path, dtype=np.uint8, mode="r") if offsets else None
+        self._chunks = [] # (offset of the chunk's data, ticks, byte length)
+        for offset in offsets:
+            chunk_ticks, length = struct.unpack(CHUNK_FORMAT, self._data[offset:offset + CHUNK_HEADER_SIZE].tobytes())
+            self._chunks.append((offset + CHUNK_HEADER_SIZE, chunk_ticks, length))
+        self._decoded = (None, None) # (chunk number, frames) of the last compressed chunk read
+
+    def _scan_chunks(self, f, size):
+        """Rebuilds the chunk index of an unclosed file by hopping from one chunk header to the next."""
+        offsets, ticks = [], 0
+        offset = HEADER_SIZE
+        frame_bytes = self.boid_count * 4 * 4
+        while offset + CHUNK_HEADER_SIZE <= size:
+            f.seek(offset)
+            chunk_ticks, length = struct.unpack(CHUNK_FORMAT, f.read(CHUNK_HEADER_SIZE))
+            end = offset + CHUNK_HEADER_SIZE + length
+            valid = 0 < chunk_ticks <= self.chunk_ticks and (self.encoding != ENCODING_RAW or length == chunk_ticks * frame_bytes)
+            if not valid or end > size:
+                break
+            offsets.append(offset)
+            ticks += chunk_ticks
+            offset = end
+        return offsets, ticks
+
+    def __len__(self):
+        return self.ticks
+
+    def _chunk_frames(self, index):
+        offset, ticks, length = self._chunks[index]
+        shape = (ticks, self.boid_count, 4)
+        if self.encoding == ENCODING_RAW:
+            return self._data[offset:offset + length].view(np.float32).reshape(shape)
+        if self._decoded[0] != index:
+            self._decoded = (index, _delta_decode(self._data[offset:offset + length], shape))
+        return self._decoded[1]
+
+    def frame(self, tick):
+        """
+        Returns (positions, velocities) of a tick (0-based) as float32 arrays: views into
+        the file for raw recordings, into the decoded chunk for compressed ones.
+        """
+        if not 0 <= tick < self.ticks:
+            raise IndexError(f"Tick {tick} is outside the recording's {self.ticks} ticks")
+        # Every chunk but the last holds exactly chunk_ticks frames
+        frame = self._chunk_frames(tick // self.chunk_ticks)[tick % self.chunk_ticks]
+        return frame[:, 0:2], frame[:, 2:4]
+
+    def params_at(self, tick):
+        """Returns the slider parameters in effect at a tick."""
+        params = dict(self.initial_params)
+        for event in self.events:
+            if event["tick"] > tick:
+                break
+            if event["name"] in params:
+                params[event["name"]] = event["value"]
+        return params
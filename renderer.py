@@ -0,0 +1,82 @@
+# renderer.py
+
+import math
+import numpy as np
+import settings # Import settings as a module to access its attributes dynamically
+
+class FlockRenderer:
+    def __init__(self, headings=None, lod_threshold=None):
+        """
+        Draws a whole flock in one batch instead of one polygon call per boid.
+        Boid triangles are pre-rotated into a sprite atlas quantised by heading and
+        blitted with a single Surface.blits call; above lod_threshold boids only a
+        point per boid is drawn.
+        :param headings: Number of pre-rotated headings, defaults to settings.RENDER_HEADINGS.
+        :param lod_threshold: Boid count above which points are drawn, defaults to
+                              settings.RENDER_LOD_THRESHOLD.
+        """
+        self.headings = headings or settings.RENDER_HEADINGS
+        self.lod_threshold = lod_threshold if lod_threshold is not None else settings.RENDER_LOD_THRESHOLD
+        self._atlases = {} # (size, color) -> list of (sprite, half_width, half_height)
+
+    def _atlas(self, size, color):
+        """Returns the pre-rotated sprites for a boid size and colour, building them on first use."""
+        key = (tuple(size), tuple(color))
+        atlas = self._atlases.get(key)
+        if atlas is not None:
+            return atlas
+
+        # Same triangle as Boid.draw, relative to its center
+        points = [
+            (size[1] / 2, 0),             # Tip
+            (-size[1] / 2, -size[0] / 2), # Back top
+            (-size[1] / 2, size[0] / 2)  # Back bottom
+        ]
+        extent = int(math.ceil(max(size))) // 2 + 1
+        colorkey = (0, 0, 0) if tuple(color) != (0, 0, 0) else (255, 0, 255)
+
+        import pygame
+        atlas = []
+        for heading in range(self.headings):
+            angle_rad = 2 * math.pi * heading / self.headings
+            cos_a, sin_a = math.cos(angle_rad), math.sin(angle_rad)
+            sprite = pygame.Surface((2 * extent + 1, 2 * extent + 1))
+            sprite.fill(colorkey)
+            sprite.set_colorkey(colorkey)
+            rotated_points = [(x * cos_a - y * sin_a + extent, x * sin_a + y * cos_a + extent) for x, y in points]
+            pygame.draw.polygon(sprite, color, rotated_points)
+            atlas.append((sprite, extent, extent))
+
+        self._atlases[key] = atlas
+        return atlas
+
+    def draw(self, screen, positions, velocities, size=(10, 20), color=settings.WHITE):
+        """
+        Draws every boid.
+        :param positions: N x 2 array of boid positions.
+        :param velocities: N x 2 array of boid velocities (their heading).
+        """
+        if len(positions) == 0:
+            return
+        if len(positions) > self.lod_threshold:
+            self.draw_points(screen, positions, color)
+            return
+
+        atlas = self._atlas(size, color)
+        angles = np.arctan2(velocities[:, 1], velocities[:, 0])
+        headings = np.rint(angles * (self.headings / (2 * math.pi))).astype(int) % self.headings
+        corners = np.rint(positions).astype(int) - atlas[0][1]
+
+        sprites = [sprite for sprite, _, _ in atlas]
+        screen.blits([(sprites[h], (x, y)) for h, (x, y) in zip(headings.tolist(), corners.tolist())], doreturn=False)
+
+    def draw_points(self, screen, positions, color=settings.WHITE):
+        """Level-of-detail fallback: one pixel per boid, written straight into the surface."""
+        import pygame
+        width, height = screen.get_size()
+        # Culling hands over boids in a margin around the view; drop those off the surface
+        inside = (positions[:, 0] >= 0) & (positions[:, 0] < width) & (positions[:, 1] >= 0) & (positions[:, 1] < height)
+        points = positions[inside].astype(int)
+        pixels = pygame.surfarray.pixels2d(screen)
+        pixels[points[:, 0], points[:, 1]] = screen.map_rgb(color)
+        del pixels # Unlock the surface
@@ -0,0 +1,83 @@
+# replay.py
+
+import sys
+import pygame
+import settings # Import settings as a module to access its attributes dynamically
+from camera import Camera
+from recording import Replay
+from renderer import FlockRenderer
+
+class ReplayViewer:
+    def __init__(self, path):
+        """
+        Plays back a recording. Frames are read straight from the memory-mapped file,
+        so seeking anywhere in a long run is instant.
+        Keys: Space play/pause, Left/Right step, Page Up/Down jump 1000 ticks, Home/End.
+        The mouse wheel zooms and a right-button drag pans.
+        """
+        self.replay = Replay(path)
+        pygame.init()
+        self.screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+        self.camera = Camera(self.screen.get_size(), self.replay.world_size)
+        pygame.display.set_caption(f"{settings.GAME_CAPTION} - replay of {path}")
+        self.clock = pygame.time.Clock()
+        self.renderer = FlockRenderer()
+        self.tick = 0
+        self.playing = True
+        self.running = True
+
+    def seek(self, tick):
+        self.tick = max(0, min(len(self.replay) - 1, tick))
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif self.camera.handle_event(event):
+                pass
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    self.playing = not self.playing
+                elif event.key == pygame.K_RIGHT:
+                    self.seek(self.tick + 1)
+                elif event.key == pygame.K_LEFT:
+                    self.seek(self.tick - 1)
+                elif event.key == pygame.K_PAGEDOWN:
+                    self.seek(self.tick + 1000)
+                elif event.key == pygame.K_PAGEUP:
+                    self.seek(self.tick - 1000)
+                elif event.key == pygame.K_HOME:
+                    self.seek(0)
+                elif event.key == pygame.K_END:
+                    self.seek(len(self.replay) - 1)
+
+    def draw(self):
+        self.screen.fill(settings.BLACK)
+        if len(self.replay):
+            positions, velocities = self.replay.frame(self.tick)
+            self.camera.draw_flock(self.screen, self.renderer, positions, velocities, (10, 20), settings.WHITE, key=self.tick)
+        if settings.FONT:
+            status = f"Tick {self.tick + 1}/{len(self.replay)}" + ("" if self.playing else " (paused)")
+            self.screen.blit(settings.FONT.render(status, True, settings.WHITE), (10, 10))
+        pygame.display.flip()
+
+    def run(self):
+        while self.running:
+            self.handle_events()
+            if self.playing and self.tick < len(self.replay) - 1:
+                self.tick += 1
+            self.draw()
+            self.clock.tick(settings.DISPLAY_FPS)
+        pygame.quit()
+        sys.exit()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay a recorded boids run.")
+    parser.add_argument("path", help="recording written with --record")
+    parser.add_argument("--start", type=int, default=0, help="tick to start from")
+    args = parser.parse_args()
+
+    viewer = ReplayViewer(args.path)
+    viewer.seek(args.start)
+    viewer.run()
@@ -1,33 +1,98 @@
 # settings.py
 
-import pygame
-
 # Screen settings
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 GAME_CAPTION = "Boids Simulation"
 
+# World settings: the (toroidal) area the boids live in, viewed through a pan/zoom camera
+WORLD_WIDTH = SCREEN_WIDTH
+WORLD_HEIGHT = SCREEN_HEIGHT
+CAMERA_ZOOM_STEPS = 4 # Zoom levels per doubling; zoom is quantised so boid sprites can be cached
+CAMERA_MAX_ZOOM = 8
+CAMERA_PAN_STEP = 100 # Screen pixels per arrow key press
+CULL_CELL_SIZE = 100 # Cell size of the grid used to find the boids inside the viewport
+
 # Boids settings
 BOID_COUNT = 50
 PERCEPTION_RADIUS = 75
 SEPARATION_RADIUS = 25
 MAX_SPEED = 3
 MAX_FORCE = 0.05
+# Topological mode: react to the NEIGHBOUR_COUNT nearest boids (found with a KD-tree)
+# instead of every boid within PERCEPTION_RADIUS; 0 keeps the metric radius rule
+NEIGHBOUR_COUNT = 0
+KDTREE_LEAF_SIZE = 16 # Most boids per KD-tree leaf
+
+# Simulation engine: "boid" (per-object reference), "numpy" (batched Flock)
+# or "parallel" (Flock spread over worker processes)
+SIMULATION_ENGINE = "boid"
+PARALLEL_WORKERS = 0 # 0 uses every core
+PARALLEL_MIN_BOIDS = 2000 # Smaller flocks use the serial update
 
 # Flocking rule weights
 COHESION_WEIGHT = 1.0
 ALIGNMENT_WEIGHT = 1.5
 SEPARATION_WEIGHT = 2.0
 
+# Species (see species.py and predator_prey.json): a list of dicts with a "name", a "count",
+# optional "color" and "size", "params" overriding the settings above for that species and
+# "rules" towards other species ("ignore", "avoid" or "chase"). Empty: a single flock.
+SPECIES = []
+AVOID_WEIGHT = 3.0 # Weight of steering away from a species that is avoided
+CHASE_WEIGHT = 1.0 # Weight of steering towards a species that is chased
 
-# Frame Rates
-FPS_OPTIONS = {
+# Rendering
+RENDER_HEADINGS = 72 # Pre-rotated sprites per boid look (5 degree steps)
+RENDER_LOD_THRESHOLD = 3000 # Above this many boids, draw one point per boid
+
+# Simulation speed in ticks per second, chosen with the speed buttons
+TICK_RATE_OPTIONS = {
     "slow": 1,
     "fast": 5,
     "very_fast": 30,
     "extremely_fast": 120,
 }
-DEFAULT_FPS = FPS_OPTIONS["extremely_fast"]
+DEFAULT_TICK_RATE = TICK_RATE_OPTIONS["extremely_fast"]
+
+# Display rate in rendered frames per second, independent of the simulation speed
+DISPLAY_FPS = 60
+MAX_TICKS_PER_FRAME = 8 # Under load, drop simulation time beyond this many ticks per frame
+
+# Adaptive quality (main.py --governor, F6): step down through governor.LEVELS while frames
+# take longer than 1 / DISPLAY_FPS, and back up once they fit comfortably again
+QUALITY_GOVERNOR = False
+GOVERNOR_SMOOTHING = 0.1 # Weight of the newest frame in the moving average frame time
+GOVERNOR_DEGRADE_FRAMES = 30 # Frames over budget before dropping a level
+GOVERNOR_RESTORE_FRAMES = 180 # Frames with headroom before restoring a level
+GOVERNOR_HEADROOM = 0.6 # A frame has headroom below this fraction of the budget
+GOVERNOR_NEIGHBOUR_CAP = 7 # Nearest neighbours per boid once neighbours are capped
+GOVERNOR_TICK_RATE_SCALE = 0.5 # Fraction of the selected speed at the lowest level
+
+# Recording
+RECORD_CHUNK_TICKS = 64 # Ticks per chunk of a recording, the unit that is written and decoded at once
+RECORD_COMPRESS = False # Delta-encode and zlib-compress every chunk: smaller files, seeking decodes one chunk
+RECORD_COMPRESSION_LEVEL = 6
+
+# Frame export
+EXPORT_QUEUE_SIZE = 8 # Frames waiting for the background writer before rendering blocks
+
+# Streaming to remote viewers
+STREAM_HOST = "0.0.0.0" # Interface the streaming server listens on
+STREAM_PORT = 8765
+STREAM_CLIENT_QUEUE = 2 # Frames waiting per viewer; beyond this a slow viewer's frames are dropped
+STREAM_COMPRESSION = 1 # zlib level for frames; low levels keep the server cheap per tick
+
+# Profiling
+PROFILER_WINDOW = 300 # Frames kept for the rolling per-phase statistics
+PROFILE_OUTPUT = "profile.json" # Default dump file; a .csv extension writes CSV
+
+# Static obstacles (see obstacles.py for the file format)
+OBSTACLES_FILE = None # JSON file loaded at startup, e.g. "arena.json"
+OBSTACLE_FIELD_RESOLUTION = 8 # Distance field grid spacing in world units
+OBSTACLE_AVOID_DISTANCE = 40 # Boids start steering away from obstacles this close
+OBSTACLE_WEIGHT = 3.0
+OBSTACLE_COLOR = (70, 70, 90)
 
 # Colors
 BLACK = (0, 0, 0)
@@ -49,7 +114,13 @@ PARAM_RANGES = {
     
     "MAX_SPEED": {"min": 1, "max": 10, "initial": MAX_SPEED, "step": 0.5, "color": BLUE},
     "MAX_FORCE": {"min": 0.01, "max": 0.1, "initial": MAX_FORCE, "step": 0.01, "color": WHITE},
+    "NEIGHBOUR_COUNT": {"min": 0, "max": 20, "initial": NEIGHBOUR_COUNT, "step": 1, "color": YELLOW},
 }
+# Each species' slider panel adds the weights of its rules towards other species
+SPECIES_PARAM_RANGES = dict(PARAM_RANGES, **{
+    "AVOID_WEIGHT": {"min": 0.0, "max": 5.0, "initial": AVOID_WEIGHT, "step": 0.1, "color": CYAN},
+    "CHASE_WEIGHT": {"min": 0.0, "max": 5.0, "initial": CHASE_WEIGHT, "step": 0.1, "color": RED},
+})
 
 # Button settings
 BUTTON_WIDTH = 80
@@ -59,9 +130,21 @@ BUTTON_SELECTED_COLOR = (50, 50, 50)
 BUTTON_TEXT_COLOR = WHITE
 
 # Font
-try:
-    pygame.font.init()
-    FONT = pygame.font.Font(None, 24)
-except pygame.error:
-    print("Warning: Font could not be loaded.")
-    FONT = None
+FONT_SIZE = 24
+
+def __getattr__(name):
+    """
+    Loads FONT on first use, so importing settings (and the simulation core with it) never
+    imports pygame or initialises its font module; only the windowed UI pays for them.
+    """
+    global FONT
+    if name != "FONT":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import pygame
+    try:
+        pygame.font.init()
+        FONT = pygame.font.Font(None, FONT_SIZE)
+    except pygame.error:
+        print("Warning: Font could not be loaded.")
+        FONT = None
+    return FONT
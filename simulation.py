@@ -0,0 +1,263 @@
+# simulation.py
+
+import random
+import numpy as np
+import params
+import obstacles as obstacle_fields
+import settings # Import settings as a module to access its attributes dynamically
+from flock import Flock
+from kdtree import KDTree
+from parallel import ParallelFlock
+from renderer import FlockRenderer
+from species import MixedFlock
+from spatial_grid import SpatialGrid
+
+# "boid": per-object reference, "numpy": batched Flock, "parallel": Flock over worker processes
+ENGINES = ("boid", "numpy", "parallel")
+
+class Simulation:
+    def __init__(self, engine=None, boid_count=None, seed=None, recorder=None, analytics=None, obstacles=None):
+        """
+        Owns the flock and advances it one tick at a time, independently of any window.
+        :param engine: One of ENGINES, defaults to settings.SIMULATION_ENGINE.
+        :param boid_count: Number of boids, defaults to settings.BOID_COUNT.
+        :param seed: Optional seed making the initial flock reproducible.
+        :param recorder: Optional recording.Recorder that receives the state after every tick.
+        :param analytics: Optional analytics.FlockAnalytics fed the neighbour pairs of every tick.
+        :param obstacles: Optional obstacles.ObstacleField the boids steer around, defaults to
+                          the one loaded from settings.OBSTACLES_FILE, if any.
+        """
+        self.engine = engine or settings.SIMULATION_ENGINE
+        self.boid_count = boid_count
+        self.seed = seed
+        self.recorder = recorder
+        self.analytics = analytics
+        if obstacles is None:
+            p = params.current()
+            obstacles = obstacle_fields.from_settings((p.world_width, p.world_height))
+        self.obstacles = obstacles
+        self.pairs = None # Neighbour pairs of the last tick, collected while analytics is on
+        self.boids = []
+        self.flock = None
+        self.grid = SpatialGrid()
+        self.renderer = FlockRenderer()
+        self.show_forces = True # Draw the debug force overlays of the flagged boids
+        self.neighbour_cap = 0 # If set, boids react to at most this many nearest neighbours
+        self.previous_positions = None # Positions before the last tick, for interpolation
+        self._boid_state = None # ((generation, tick), positions, velocities) of the boid engine, see current_state
+        self.neighbour_checks = 0 # Pairs examined during the last tick
+        self.tick = 0
+        self.generation = 0 # Counts resets, so (generation, tick) identifies a state
+        self.reset()
+
+    def reset(self):
+        """Create and add all boids to the scene."""
+        count = self.boid_count if self.boid_count is not None else settings.BOID_COUNT
+        if self.seed is not None:
+            random.seed(self.seed)
+        self.tick = 0
+        self.generation += 1
+        self.previous_positions = None
+        self.boids = []
+        self.close()
+        if self.recorder is not None and self.recorder.ticks:
+            self.recorder.record_event("reset")
+
+        if settings.SPECIES:
+            # Species are always stored and updated in per-species batches, whatever the engine
+            self.flock = MixedFlock(settings.SPECIES, rng=np.random.default_rng(self.seed))
+            if self.boid_count is not None and len(self.flock) != self.boid_count:
+                raise ValueError(f"The species add up to {len(self.flock)} boids, not {self.boid_count}")
+        elif self.engine == "numpy":
+            self.flock = Flock(count, rng=np.random.default_rng(self.seed))
+        elif self.engine == "parallel":
+            self.flock = ParallelFlock(count, rng=np.random.default_rng(self.seed))
+        else:
+            from boid import Boid # Needs pygame, which the array engines never import
+            for _ in range(count):
+                self.boids.append(Boid())
+        if self.flock is not None:
+            self.flock.renderer = self.renderer # One renderer, and sprite cache, whichever engine draws
+        self.set_analytics(self.analytics)
+
+    def set_analytics(self, analytics):
+        """Turns per-tick analytics on (with an analytics.FlockAnalytics) or off (None)."""
+        self.analytics = analytics
+        self.pairs = None
+        if self.flock is not None:
+            self.flock.track_pairs = analytics is not None
+
+    def close(self):
+        """Shuts down the current flock engine (e.g. its worker pool)."""
+        if self.flock is not None:
+            self.flock.close()
+            self.flock = None
+
+    def update(self, keep_previous=False):
+        """
+        Advances the flock by one tick.
+        :param keep_previous: Remember the positions before the tick so draw() can interpolate.
+        """
+        self.previous_positions = self.state()[0] if keep_previous else None
+        self.tick += 1
+        # One snapshot for the whole tick, so a slider moved mid-tick cannot mix two parameter sets
+        p = params.current()
+        if self.neighbour_cap:
+            p = p.capped(self.neighbour_cap)
+        if self.flock is not None:
+            self.flock.update(p, self.obstacles)
+            self.neighbour_checks = self.flock.neighbour_checks
+            self.pairs = self.flock.pairs
+        else:
+            self._update_boids(p)
+        if self.analytics is not None:
+            self.analytics.update(self.tick, *self.pairs, self.state()[1])
+        if self.recorder is not None:
+            self.recorder.record(*self.state())
+
+    def _update_boids(self, p):
+        if p.neighbour_count > 0:
+            # Topological mode: one KD-tree query per tick hands every boid its nearest boids
+            positions = np.array([(boid.position.x, boid.position.y) for boid in self.boids], dtype=float).reshape(-1, 2)
+            tree = KDTree(positions, (p.world_width, p.world_height))
+            nearest = tree.nearest(p.neighbour_count).tolist()
+            checks = tree.neighbour_checks
+        else:
+            # Bin the boids once per tick so each boid only scans the cells around it
+            self.grid.rebuild(self.boids, p)
+            nearest = None
+            checks = 0
+        track_pairs = self.analytics is not None
+        neighbours = [] if track_pairs else None
+        for i, boid in enumerate(self.boids):
+            if nearest is not None:
+                candidates = [self.boids[j] for j in nearest[i]]
+            else:
+                candidates = self.grid.neighbours(boid.position)
+                checks += len(candidates)
+            found = [] if track_pairs else None
+            boid.update(candidates, p, found, self.obstacles)
+            if track_pairs:
+                neighbours.append(found)
+        self.neighbour_checks = checks
+
+        if track_pairs:
+            index = {id(boid): i for i, boid in enumerate(self.boids)}
+            counts = [len(found) for found in neighbours]
+            self.pairs = (np.repeat(np.arange(len(self.boids)), counts),
+                          np.array([index[id(other)] for found in neighbours for other in found], dtype=int))
+
+    def interpolated_positions(self, alpha, rows=None):
+        """
+        Returns positions a fraction alpha of the way from the previous tick to the current one,
+        or None when there is nothing to interpolate. Boids that wrapped around an edge are not
+        slid across the screen; they are drawn at their current position.
+        :param rows: Only interpolate these boids (e.g. the visible ones), one row each.
+        """
+        if self.previous_positions is None or alpha >= 1:
+            return None
+        positions, previous = self.current_state()[0], self.previous_positions
+        if len(positions) != len(previous):
+            return None
+        if rows is not None:
+            positions, previous = positions[rows], previous[rows]
+        delta = positions - previous
+        p = params.current()
+        wrapped = (np.abs(delta[:, 0]) > p.world_width / 2) | (np.abs(delta[:, 1]) > p.world_height / 2)
+        delta[wrapped] = 0
+        return np.where(wrapped[:, None], positions, previous + delta * alpha)
+
+    def draw(self, screen, alpha=1.0, camera=None):
+        """
+        Draws the flock.
+        :param alpha: Fraction of a tick elapsed since the last update, for interpolated drawing.
+        :param camera: Optional camera.Camera; only the boids in its view are drawn.
+        """
+        if camera is not None:
+            self._draw_view(screen, alpha, camera)
+            return
+        positions = self.interpolated_positions(alpha)
+        if self.flock is not None:
+            self.flock.draw(screen, positions, self.show_forces)
+            return
+
+        # Batch the boids by look, then add the per-boid debug overlays on top
+        groups = {}
+        for i, boid in enumerate(self.boids):
+            groups.setdefault((tuple(boid.size), tuple(boid.color)), []).append(i)
+        for (size, color), indices in groups.items():
+            boids = [self.boids[i] for i in indices]
+            if positions is not None:
+                group_positions = positions[indices]
+            else:
+                group_positions = np.array([(b.position.x, b.position.y) for b in boids], dtype=float)
+            velocities = np.array([(b.velocity.x, b.velocity.y) for b in boids], dtype=float)
+            self.renderer.draw(screen, group_positions, velocities, size, color)
+        if not self.show_forces:
+            return
+        for boid in self.boids:
+            if boid._render_forces:
+                boid.draw_forces(screen)
+
+    def _draw_view(self, screen, alpha, camera):
+        # The camera's index is rebuilt once per tick; after that a frame only gathers,
+        # interpolates and draws the boids in view
+        current, velocities = self.current_state()
+        looks = self.looks()
+        # Interpolated positions lie within one tick's travel of the current ones, which are indexed
+        p = params.current()
+        margin = max([p.max_speed] + [snapshot.max_speed for _, snapshot in p.species])
+        visible = camera.visible_looks(current, looks, key=(self.generation, self.tick), margin=margin)
+        positions = self.interpolated_positions(alpha, visible)
+        if positions is None:
+            positions = current[visible]
+        camera.draw_visible(screen, self.renderer, visible, positions, velocities[visible], looks)
+
+        # Debug force overlays of the flagged boids in view
+        if not self.show_forces:
+            return
+        if self.flock is not None:
+            flagged = self.flock.render_forces[visible]
+        else:
+            flagged = np.array([self.boids[i]._render_forces for i in visible.tolist()], dtype=bool).reshape(-1)
+        shown = visible[flagged]
+        if len(shown) == 0:
+            return
+        screen_positions = camera.to_screen(positions[flagged])
+        if self.flock is not None:
+            self.flock.draw_forces(screen, screen_positions, camera.zoom, shown)
+        else:
+            for i, position in zip(shown.tolist(), screen_positions.tolist()):
+                self.boids[i].draw_forces(screen, position, camera.zoom)
+
+    def looks(self):
+        """
+        Returns the (rows, size, color) looks the flock is drawn with, for drawing it from a
+        state snapshot: the boids in each rows slice of state() share one size and colour.
+        """
+        flock, boids = self.flock, self.boids # Read once; a simulation thread may be resetting them
+        if flock is not None:
+            return flock.looks
+        if boids:
+            return [(slice(0, len(boids)), boids[0].size, boids[0].color)]
+        return [(slice(0, 0), (10, 20), settings.WHITE)]
+
+    def current_state(self):
+        """
+        Returns (positions, velocities) to draw from, without copying the flock's arrays; the
+        boid engine's are gathered once per tick. Treat them as read-only.
+        """
+        if self.flock is not None:
+            return self.flock.positions, self.flock.velocities
+        key = (self.generation, self.tick)
+        if self._boid_state is None or self._boid_state[0] != key:
+            self._boid_state = (key,) + self.state()
+        return self._boid_state[1:]
+
+    def state(self):
+        """Returns (positions, velocities) as N x 2 arrays, whichever engine is running."""
+        if self.flock is not None:
+            return self.flock.positions.copy(), self.flock.velocities.copy()
+        positions = np.array([(b.position.x, b.position.y) for b in self.boids], dtype=float).reshape(-1, 2)
+        velocities = np.array([(b.velocity.x, b.velocity.y) for b in self.boids], dtype=float).reshape(-1, 2)
+        return positions, velocities
@@ -0,0 +1,65 @@
+# spatial_grid.py
+
+import params
+
+class SpatialGrid:
+    def __init__(self):
+        """
+        Uniform grid over the (toroidal) screen used to find nearby boids.
+        Cells are at least as wide as the largest interaction radius, so every
+        neighbour of a boid lies in its own cell or one of the eight around it.
+        """
+        self.cells = {}
+        self._layout_key = None
+        self._version = None
+        self._configure(params.current())
+
+    def _configure(self, p):
+        """Recompute the cell layout from a params.SimulationParams snapshot."""
+        # cell_size pads the radius by the distance two boids can close within one tick,
+        # since boids move one after another while the grid is only rebuilt once per tick
+        self.cols = max(1, int(p.world_width // p.cell_size))
+        self.rows = max(1, int(p.world_height // p.cell_size))
+        self.cell_width = p.world_width / self.cols
+        self.cell_height = p.world_height / self.rows
+
+        # Precompute the (wrapped) 3x3 neighbourhood of every cell; a set removes
+        # duplicates when the grid is fewer than three cells across
+        self._neighbourhoods = {}
+        for col in range(self.cols):
+            for row in range(self.rows):
+                self._neighbourhoods[(col, row)] = list({
+                    ((col + dc) % self.cols, (row + dr) % self.rows)
+                    for dc in (-1, 0, 1) for dr in (-1, 0, 1)
+                })
+
+        self._layout_key = (p.cell_size, p.world_width, p.world_height)
+
+    def _cell_of(self, position):
+        # Positions on the far edge (x == world width) wrap into the first cell
+        return (int(position.x / self.cell_width) % self.cols,
+                int(position.y / self.cell_height) % self.rows)
+
+    def rebuild(self, boids, p=None):
+        """
+        Re-bins every boid; the layout is recomputed if a slider changed a radius.
+        :param p: The tick's params.SimulationParams snapshot, defaults to the current one.
+        """
+        p = p or params.current()
+        if p.version != self._version:
+            self._version = p.version
+            if (p.cell_size, p.world_width, p.world_height) != self._layout_key:
+                self._configure(p)
+
+        self.cells = {}
+        for boid in boids:
+            self.cells.setdefault(self._cell_of(boid.position), []).append(boid)
+
+    def neighbours(self, position):
+        """Returns the boids in the cell containing position and the cells around it."""
+        nearby = []
+        for cell in self._neighbourhoods[self._cell_of(position)]:
+            members = self.cells.get(cell)
+            if members:
+                nearby.extend(members)
+        return nearby
@@ -0,0 +1,190 @@
+# species.py
+
+import json
+import numpy as np
+import params
+import settings # Import settings as a module to access its attributes dynamically
+from flock import CHUNK_SIZE, Flock, _limit, _normalize
+
+# How a species reacts to another one
+RULES = ("ignore", "avoid", "chase")
+
+def load_species(path):
+    """
+    Loads species definitions (see settings.SPECIES) from a JSON file holding a list of them.
+    :return: The list of species dicts.
+    """
+    with open(path) as f:
+        species = json.load(f)
+    for spec in species:
+        if "name" not in spec or "count" not in spec:
+            raise ValueError(f"Every species needs a name and a count: {spec}")
+    return species
+
+def use_species(path):
+    """Makes the species in a JSON file the ones simulated, sizing BOID_COUNT to match, and republishes params."""
+    settings.SPECIES = load_species(path)
+    settings.BOID_COUNT = sum(int(spec["count"]) for spec in settings.SPECIES)
+    params.reload()
+
+def cross_sums(positions, targets, radius):
+    """
+    Sums over the targets within radius of every position, for one species reacting to
+    another: their centre of mass (2), the push away from them, d / |d|^2 (2), and their
+    count. Both sets are swept along x in chunks, as in flock.partition.
+    :return: (N x 5 sums, number of pairs examined).
+    """
+    sums = np.zeros((len(positions), 5))
+    if len(positions) == 0 or len(targets) == 0:
+        return sums, 0
+    order = np.argsort(positions[:, 0], kind="stable")
+    sorted_positions = positions[order]
+    sorted_targets = targets[np.argsort(targets[:, 0], kind="stable")]
+    radius_sq = radius * radius
+
+    checks = 0
+    for start in range(0, len(order), CHUNK_SIZE):
+        rows = sorted_positions[start:start + CHUNK_SIZE]
+        first = np.searchsorted(sorted_targets[:, 0], rows[0, 0] - radius, side="left")
+        last = np.searchsorted(sorted_targets[:, 0], rows[-1, 0] + radius, side="right")
+        candidates = sorted_targets[first:last]
+        checks += len(rows) * len(candidates)
+
+        dx = rows[:, 0, None] - candidates[None, :, 0]
+        dy = rows[:, 1, None] - candidates[None, :, 1]
+        distance_sq = dx * dx + dy * dy
+        near = distance_sq < radius_sq
+        weights = near.astype(float)
+        inverse_sq = np.divide(1.0, distance_sq, out=np.zeros_like(distance_sq), where=near & (distance_sq > 0))
+
+        chunk = np.empty((len(rows), 5))
+        chunk[:, 0] = (weights * candidates[None, :, 0]).sum(axis=1)
+        chunk[:, 1] = (weights * candidates[None, :, 1]).sum(axis=1)
+        chunk[:, 2] = (dx * inverse_sq).sum(axis=1)
+        chunk[:, 3] = (dy * inverse_sq).sum(axis=1)
+        chunk[:, 4] = weights.sum(axis=1)
+        sums[order[start:start + CHUNK_SIZE]] = chunk
+    return sums, checks
+
+class MixedFlock(Flock):
+    def __init__(self, species, rng=None):
+        """
+        Flock of several species, each with its own parameters (params.SimulationParams.species),
+        look and rules towards the others. The boids are stored grouped by species: species i
+        owns the contiguous rows blocks[i] of every array, so its flocking pass, integration
+        and drawing each run as one batch over its own block with its own parameters, and
+        no pair loop ever branches on species.
+        :param species: Species definitions, as in settings.SPECIES.
+        :param rng: Optional numpy Generator, for reproducible flocks.
+        """
+        counts = [int(spec["count"]) for spec in species]
+        super().__init__(sum(counts), rng)
+        self.names = [spec["name"] for spec in species]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"Species names must be unique: {self.names}")
+        stops = np.cumsum(counts, dtype=int).tolist()
+        self.blocks = [slice(stop - count, stop) for stop, count in zip(stops, counts)]
+        self._looks = [(block, tuple(spec.get("size", self.size)), tuple(spec.get("color", self.color)))
+                       for block, spec in zip(self.blocks, species)]
+
+        index = {name: i for i, name in enumerate(self.names)}
+        self.rules = [] # (species, other species, rule) for every rule other than "ignore"
+        for i, spec in enumerate(species):
+            for other, rule in spec.get("rules", {}).items():
+                if rule not in RULES:
+                    raise ValueError(f"Unknown rule {rule} of species {spec['name']}, expected one of {RULES}")
+                if other not in index:
+                    raise ValueError(f"Unknown species {other} in the rules of {spec['name']}")
+                if rule != "ignore":
+                    self.rules.append((i, index[other], rule))
+
+        # One Flock per species runs the flocking pass over views of that species' block
+        self._parts = [Flock(0) for _ in species]
+        self.rule_forces = np.zeros_like(self.positions)
+        p = params.current()
+        for name, block in zip(self.names, self.blocks):
+            self.velocities[block] = _normalize(self.velocities[block]) * p.for_species(name).max_speed
+
+    @property
+    def looks(self):
+        return self._looks
+
+    def _rule_forces(self, snapshots):
+        """
+        Weighted forces of the rules between species: a boid avoids the boids of another
+        species within its perception radius, as in separation, or chases their centre of
+        mass, as in cohesion.
+        :return: (N x 2 forces, number of pairs examined).
+        """
+        forces = np.zeros_like(self.positions)
+        checks = 0
+        for i, other, rule in self.rules:
+            block, p = self.blocks[i], snapshots[i]
+            positions, velocities = self.positions[block], self.velocities[block]
+            sums, examined = cross_sums(positions, self.positions[self.blocks[other]], p.perception_radius)
+            checks += examined
+            if rule == "avoid":
+                push = sums[:, 2:4]
+                force = _limit(_normalize(push) * p.max_speed - velocities, p.max_force) * p.avoid_weight
+                force[np.hypot(push[:, 0], push[:, 1]) == 0] = 0
+            else:
+                count = sums[:, 4]
+                center = sums[:, 0:2] / np.where(count > 0, count, 1.0)[:, None]
+                force = _limit(_normalize(center - positions) * p.max_speed - velocities, p.max_force) * p.chase_weight
+                force[count == 0] = 0
+            forces[block] += force
+        return forces, checks
+
+    def update(self, p=None, obstacles=None):
+        """
+        Advances every boid by one tick, each species with its own parameters.
+        :param p: The tick's params.SimulationParams snapshot, defaults to the current one.
+        :param obstacles: Optional obstacles.ObstacleField to steer around.
+        """
+        p = p or params.current()
+        snapshots = [p.for_species(name) for name in self.names]
+        # Every species reacts to the others as they were before anyone moved
+        self.rule_forces, checks = self._rule_forces(snapshots)
+
+        velocities = np.empty_like(self.velocities)
+        pairs = []
+        for part, block, species_params in zip(self._parts, self.blocks, snapshots):
+            if block.start == block.stop:
+                continue
+            part.positions, part.velocities = self.positions[block], self.velocities[block]
+            part.track_pairs = self.track_pairs
+            part.compute_forces(species_params)
+            self.cohesion_forces[block] = part.cohesion_forces
+            self.alignment_forces[block] = part.alignment_forces
+            self.separation_forces[block] = part.separation_forces
+
+            accelerations = part.cohesion_forces + part.alignment_forces + part.separation_forces + self.rule_forces[block]
+            if obstacles is not None:
+                accelerations += obstacles.steer(part.positions, part.velocities,
+                                                 species_params.max_speed, species_params.max_force)
+            self.accelerations[block] = accelerations
+            velocities[block] = _limit(part.velocities + accelerations, species_params.max_speed)
+            checks += part.neighbour_checks
+            if part.pairs is not None:
+                pairs.append((part.pairs[0] + block.start, part.pairs[1] + block.start))
+
+        self.neighbour_checks = checks
+        if not self.track_pairs:
+            self.pairs = None
+        elif pairs:
+            # Only neighbours of the same species link boids into one flock
+            self.pairs = (np.concatenate([firsts for firsts, _ in pairs]), np.concatenate([seconds for _, seconds in pairs]))
+        else:
+            self.pairs = (np.empty(0, dtype=int), np.empty(0, dtype=int))
+        self._move(velocities, p)
+
+    def draw_forces(self, screen, positions=None, scale=1.0, indices=None, p=None):
+        """Draws the force overlays of the flagged boids, with the radii of their own species."""
+        if indices is None:
+            indices = np.flatnonzero(self.render_forces)
+            positions = (self.positions if positions is None else positions)[indices]
+        p = p or params.current()
+        for name, block in zip(self.names, self.blocks):
+            inside = (indices >= block.start) & (indices < block.stop)
+            if inside.any():
+                super().draw_forces(screen, positions[inside], scale, indices[inside], p.for_species(name))
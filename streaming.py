@@ -0,0 +1,316 @@
+# streaming.py
+
+import math
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+import numpy as np
+import settings # Import settings as a module to access its attributes dynamically
+
+# Wire format, all little-endian:
+#   hello  HELLO_FORMAT: magic, protocol version, world width and height (sent once on connect)
+#   frame  FRAME_FORMAT: kind, tick, boid count, payload length; then the zlib-compressed payload
+# A payload holds three uint16 columns, x, y and heading, one value per boid. Coordinates are
+# quantised over the world size and headings over a full turn. A KEY frame carries the values
+# themselves; a DELTA frame the difference from the viewer's previous frame, modulo 2**16,
+# which is mostly small numbers and compresses far better.
+MAGIC = b"FLOIDSTR"
+PROTOCOL_VERSION = 1
+HELLO_FORMAT = "<8sIff"
+HELLO_SIZE = struct.calcsize(HELLO_FORMAT)
+FRAME_FORMAT = "<BIII"
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)
+KEY, DELTA = 0, 1
+QUANTUM = 65535
+
+def quantise(positions, velocities, world_size):
+    """Returns a 3 x N uint16 array of quantised x, y and heading."""
+    width, height = world_size
+    values = np.empty((3, len(positions)), dtype=np.uint16)
+    values[0] = np.clip(np.rint(positions[:, 0] * (QUANTUM / width)), 0, QUANTUM)
+    values[1] = np.clip(np.rint(positions[:, 1] * (QUANTUM / height)), 0, QUANTUM)
+    angles = np.arctan2(velocities[:, 1], velocities[:, 0])
+    values[2] = np.rint(angles * (65536 / (2 * math.pi))).astype(np.int64) % 65536
+    return values
+
+def dequantise(values, world_size):
+    """Inverse of quantise: returns (positions, headings) with unit heading vectors."""
+    width, height = world_size
+    positions = np.column_stack((values[0] * (width / QUANTUM), values[1] * (height / QUANTUM)))
+    angles = values[2] * (2 * math.pi / 65536)
+    return positions, np.column_stack((np.cos(angles), np.sin(angles)))
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Stream closed")
+        data.extend(chunk)
+    return bytes(data)
+
+class _Viewer(threading.Thread):
+    def __init__(self, connection, address, queue_size):
+        """Sends frames to one viewer from its own thread, so a slow socket only delays that viewer."""
+        super().__init__(daemon=True)
+        self.connection = connection
+        self.address = address
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.last_tick = None # Tick of the last frame queued, the base of its next delta
+        self.dropped = 0
+        self.closed = False
+        self.start()
+
+    def offer(self, tick, key, delta, previous_tick):
+        """Queues the tick's frame without blocking; a viewer that is behind misses it and resyncs on a key frame."""
+        message = delta if self.last_tick == previous_tick and previous_tick is not None else key()
+        try:
+            self.frames.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+            self.last_tick = None # Its next frame must be a key frame
+            return
+        self.last_tick = tick
+
+    def run(self):
+        try:
+            while True:
+                message = self.frames.get()
+                if message is None:
+                    break
+                self.connection.sendall(message)
+        except OSError:
+            pass
+        finally:
+            self.closed = True
+            self.connection.close()
+
+    def close(self):
+        self.closed = True
+        try:
+            self.frames.put_nowait(None)
+        except queue.Full:
+            self.connection.close() # Unblocks a pending sendall
+        self.join(1.0)
+
+class StreamServer:
+    def __init__(self, world_size, host=None, port=None, queue_size=None):
+        """
+        Publishes the flock state of every tick to any number of TCP viewers.
+        publish() encodes a tick once and never blocks: every viewer has a small queue,
+        and frames that do not fit are dropped for that viewer only.
+        :param world_size: (width, height) of the world, used to quantise coordinates.
+        :param host: Interface to listen on, defaults to settings.STREAM_HOST.
+        :param port: Port to listen on (0 picks a free one), defaults to settings.STREAM_PORT.
+        :param queue_size: Frames waiting per viewer, defaults to settings.STREAM_CLIENT_QUEUE.
+        """
+        self.world_size = tuple(float(v) for v in world_size)
+        self.queue_size = queue_size or settings.STREAM_CLIENT_QUEUE
+        self.viewers = []
+        self._lock = threading.Lock()
+        self._previous = None # (tick, quantised values) of the last published tick
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host or settings.STREAM_HOST, settings.STREAM_PORT if port is None else port))
+        self._socket.listen()
+        self.address = self._socket.getsockname()
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, address = self._socket.accept()
+            except OSError:
+                return # Server closed
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                connection.sendall(struct.pack(HELLO_FORMAT, MAGIC, PROTOCOL_VERSION, *self.world_size))
+            except OSError:
+                connection.close()
+                continue
+            with self._lock:
+                self.viewers.append(_Viewer(connection, address, self.queue_size))
+
+    @staticmethod
+    def _frame(kind, tick, count, values):
+        payload = zlib.compress(values.tobytes(), settings.STREAM_COMPRESSION)
+        return struct.pack(FRAME_FORMAT, kind, tick, count, len(payload)) + payload
+
+    def publish(self, tick, positions, velocities):
+        """Sends one tick to every connected viewer."""
+        values = quantise(positions, velocities, self.world_size)
+        count = len(positions)
+        previous = self._previous
+        self._previous = (tick, values)
+
+        with self._lock:
+            self.viewers = [viewer for viewer in self.viewers if not viewer.closed]
+            viewers = list(self.viewers)
+        if not viewers:
+            return
+
+        # Each frame is encoded at most once per tick, however many viewers there are
+        delta = None
+        previous_tick = None
+        if previous is not None and previous[1].shape == values.shape:
+            previous_tick = previous[0]
+            delta = self._frame(DELTA, tick, count, values - previous[1]) # uint16 wraps around
+        key_frame = []
+        def key():
+            if not key_frame:
+                key_frame.append(self._frame(KEY, tick, count, values))
+            return key_frame[0]
+        for viewer in viewers:
+            viewer.offer(tick, key, delta, previous_tick)
+
+    def close(self):
+        self._socket.close()
+        with self._lock:
+            viewers, self.viewers = self.viewers, []
+        for viewer in viewers:
+            viewer.close()
+
+class StreamClient(threading.Thread):
+    def __init__(self, host, port):
+        """Receives a stream in a background thread and keeps the latest decoded frame."""
+        super().__init__(daemon=True)
+        self.socket = socket.create_connection((host, port))
+        magic, version, width, height = struct.unpack(HELLO_FORMAT, _recv_exactly(self.socket, HELLO_SIZE))
+        if magic != MAGIC:
+            raise ValueError(f"{host}:{port} is not a boids stream")
+        if version != PROTOCOL_VERSION:
+            raise ValueError(f"Unsupported stream version {version}")
+        self.world_size = (width, height)
+        self.tick = None
+        self.frames = 0
+        self.bytes = 0
+        self.error = None
+        self._values = None
+        self._lock = threading.Lock()
+        self.start()
+
+    def run(self):
+        try:
+            while True:
+                kind, tick, count, length = struct.unpack(FRAME_FORMAT, _recv_exactly(self.socket, FRAME_SIZE))
+                payload = _recv_exactly(self.socket, length)
+                values = np.frombuffer(zlib.decompress(payload), dtype=np.uint16).reshape(3, count)
+                if kind == DELTA:
+                    if self._values is None or self._values.shape != values.shape:
+                        raise ValueError("Delta frame without a key frame")
+                    values = self._values + values # uint16 wraps around
+                with self._lock:
+                    self._values = values
+                    self.tick = tick
+                self.frames += 1
+                self.bytes += FRAME_SIZE + length
+        except (OSError, ValueError, zlib.error) as e:
+            self.error = e
+
+    def latest(self):
+        """Returns (positions, headings, tick) of the newest frame, or None before the first one."""
+        with self._lock:
+            values, tick = self._values, self.tick
+        if values is None:
+            return None
+        positions, headings = dequantise(values, self.world_size)
+        return positions, headings, tick
+
+    def close(self):
+        self.socket.close()
+
+def serve(engine=None, boid_count=None, seed=None, tick_rate=None, host=None, port=None, overrides=None):
+    """Runs a headless simulation at tick_rate ticks per second (0 = flat out) and streams every tick."""
+    from headless import apply_overrides
+    import params
+    from simulation import Simulation
+
+    apply_overrides(overrides)
+    simulation = Simulation(engine, boid_count, seed)
+    p = params.current()
+    server = StreamServer((p.world_width, p.world_height), host, port)
+    print(f"Streaming {len(simulation.state()[0])} boids on {server.address[0]}:{server.address[1]}", file=sys.stderr)
+    tick_rate = settings.DEFAULT_TICK_RATE if tick_rate is None else tick_rate
+    next_tick = time.perf_counter()
+    try:
+        while True:
+            simulation.update()
+            server.publish(simulation.tick, *simulation.state())
+            if tick_rate:
+                next_tick = max(next_tick + 1.0 / tick_rate, time.perf_counter() - 1.0)
+                time.sleep(max(0.0, next_tick - time.perf_counter()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        simulation.close()
+
+def view(host, port):
+    """Opens a window rendering a stream."""
+    import pygame
+    from camera import Camera
+    from renderer import FlockRenderer
+
+    client = StreamClient(host, port)
+    pygame.init()
+    screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    camera = Camera(screen.get_size(), client.world_size)
+    pygame.display.set_caption(f"{settings.GAME_CAPTION} - {host}:{port}")
+    clock = pygame.time.Clock()
+    renderer = FlockRenderer()
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            camera.handle_event(event)
+        screen.fill(settings.BLACK)
+        latest = client.latest()
+        if latest is not None:
+            positions, headings, tick = latest
+            camera.draw_flock(screen, renderer, positions, headings, (10, 20), settings.WHITE, key=tick)
+        if settings.FONT:
+            if client.error is not None:
+                status = f"Disconnected: {client.error}"
+            else:
+                status = f"Tick {client.tick} | {client.bytes / max(client.frames, 1) / 1024:.1f} KiB/frame"
+            screen.blit(settings.FONT.render(status, True, settings.WHITE), (10, 10))
+        pygame.display.flip()
+        clock.tick(settings.DISPLAY_FPS)
+    client.close()
+    pygame.quit()
+
+if __name__ == "__main__":
+    import argparse
+    from simulation import ENGINES
+    parser = argparse.ArgumentParser(description="Stream a headless simulation to remote viewers, or view a stream.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    server_parser = commands.add_parser("serve", help="run a headless simulation and stream it")
+    server_parser.add_argument("--host", default=settings.STREAM_HOST)
+    server_parser.add_argument("--port", type=int, default=settings.STREAM_PORT)
+    server_parser.add_argument("--engine", choices=ENGINES, default=settings.SIMULATION_ENGINE)
+    server_parser.add_argument("--boids", type=int, default=None, help="number of boids (default: settings.BOID_COUNT)")
+    server_parser.add_argument("--seed", type=int, default=None, help="seed for the initial flock")
+    server_parser.add_argument("--tick-rate", type=float, default=None,
+                               help="ticks per second (default: settings.DEFAULT_TICK_RATE, 0 = as fast as possible)")
+    server_parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE",
+                               help="override a setting (repeatable)")
+    viewer_parser = commands.add_parser("view", help="render a stream in a window")
+    viewer_parser.add_argument("address", help="HOST:PORT of a streaming server")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        # Imported here: headless keeps SDL away from the display, which the viewer needs
+        from headless import parse_override
+        serve(args.engine, args.boids, args.seed, args.tick_rate, args.host, args.port,
+              dict(parse_override(o) for o in args.overrides))
+    else:
+        host, _, port = args.address.rpartition(":")
+        view(host or "localhost", int(port))
@@ -0,0 +1,102 @@
+# sweep.py
+
+import csv
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+import settings # Import settings as a module to access its attributes dynamically
+
+METRIC_COLUMNS = ["polarisation", "mean_nn_distance", "clusters", "largest_cluster"]
+# The parallel engine starts its own pool, which pool workers are not allowed to do
+SWEEP_ENGINES = ("boid", "numpy")
+
+def _check_names(names):
+    for name in names:
+        if name not in settings.PARAM_RANGES:
+            raise ValueError(f"{name} is not in PARAM_RANGES")
+
+def grid_cases(names, steps):
+    """
+    Returns the full grid over some slider ranges, steps evenly spaced values per parameter.
+    :param names: Keys of settings.PARAM_RANGES.
+    :return: A list of {name: value} dicts.
+    """
+    _check_names(names)
+    axes = [np.linspace(settings.PARAM_RANGES[name]["min"], settings.PARAM_RANGES[name]["max"], steps).tolist()
+            for name in names]
+    return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+def random_cases(names, samples, seed=None):
+    """Returns samples uniformly random points in some slider ranges, as {name: value} dicts."""
+    _check_names(names)
+    rng = np.random.default_rng(seed)
+    return [{name: float(rng.uniform(settings.PARAM_RANGES[name]["min"], settings.PARAM_RANGES[name]["max"]))
+             for name in names} for _ in range(samples)]
+
+def run_case(task):
+    """
+    Runs one headless simulation and measures the flock it ends with. Executed in a pool worker.
+    :param task: (run index, overrides, ticks, seed, boid count, engine)
+    :return: A result row: the index, the overrides, timing and the metrics.
+    """
+    from headless import run_headless
+    from metrics import flock_metrics
+    import params
+
+    index, overrides, ticks, seed, boid_count, engine = task
+    result = run_headless(ticks, seed, boid_count, engine, overrides)
+    row = {"run": index, **overrides, "ticks_per_second": result["ticks_per_second"]}
+    row.update(flock_metrics(result["positions"], result["velocities"], params.current().perception_radius))
+    return row
+
+def run_sweep(cases, output, ticks, seed=None, boid_count=None, engine="numpy", workers=None):
+    """
+    Runs every case in a process pool and appends a CSV row as each run finishes,
+    so partial results survive an interrupted sweep.
+    :param cases: A list of {setting name: value} dicts, e.g. from grid_cases or random_cases.
+    :param workers: Worker processes, defaults to every core.
+    :return: The number of runs written.
+    """
+    if engine not in SWEEP_ENGINES:
+        raise ValueError(f"Sweeps run one simulation per worker; use one of {SWEEP_ENGINES}")
+    names = sorted({name for case in cases for name in case})
+    fieldnames = ["run"] + names + ["ticks_per_second"] + METRIC_COLUMNS
+    tasks = [(i, case, ticks, seed, boid_count, engine) for i, case in enumerate(cases)]
+
+    written = 0
+    start = time.perf_counter()
+    with open(output, "w", newline="") as f, multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in pool.imap_unordered(run_case, tasks):
+            writer.writerow(row)
+            f.flush()
+            written += 1
+            print(f"{written}/{len(tasks)} runs done ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+    return written
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sweep flocking parameters and measure the resulting flocks.")
+    parser.add_argument("--params", nargs="+", default=list(settings.PARAM_RANGES), metavar="NAME",
+                        help="slider parameters to vary over their PARAM_RANGES (default: all)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--grid", type=int, default=None, metavar="STEPS", help="full grid with STEPS values per parameter")
+    mode.add_argument("--samples", type=int, default=None, help="number of random samples (default: 32)")
+    parser.add_argument("--sample-seed", type=int, default=None, help="seed for the random samples")
+    parser.add_argument("--ticks", type=int, default=500, help="simulation ticks per run")
+    parser.add_argument("--boids", type=int, default=None, help="number of boids (default: settings.BOID_COUNT)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for every run's initial flock")
+    parser.add_argument("--engine", choices=SWEEP_ENGINES, default="numpy")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default="sweep.csv", help="CSV file, one row per finished run")
+    args = parser.parse_args()
+
+    if args.grid is not None:
+        cases = grid_cases(args.params, args.grid)
+    else:
+        cases = random_cases(args.params, args.samples or 32, args.sample_seed)
+    run_sweep(cases, args.output, args.ticks, args.seed, args.boids, args.engine, args.workers)
@@ -0,0 +1,57 @@
+# test_flock.py
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import copy
+import random
+import numpy as np
+import pytest
+import params
+from boid import Boid
+from flock import Flock
+from kdtree import KDTree
+
+BOID_COUNT = 120
+
+def _boids(seed):
+    random.seed(seed)
+    boids = [Boid() for _ in range(BOID_COUNT)]
+    # Pack some of them together so every rule, separation included, has neighbours to act on
+    for boid in boids[:BOID_COUNT // 3]:
+        boid.position.x = 300 + random.uniform(0, 40)
+        boid.position.y = 300 + random.uniform(0, 40)
+    return boids
+
+def _boid_forces(boids, p):
+    """Each boid's weighted forces from Boid.update, every one taken from the same unmoved flock."""
+    nearest = None
+    if p.neighbour_count > 0:
+        positions = np.array([(b.position.x, b.position.y) for b in boids], dtype=float)
+        nearest = KDTree(positions, (p.world_width, p.world_height)).nearest(p.neighbour_count).tolist()
+    forces = np.empty((3, len(boids), 2))
+    for i in range(len(boids)):
+        unmoved = copy.deepcopy(boids)
+        candidates = unmoved if nearest is None else [unmoved[j] for j in nearest[i]]
+        unmoved[i].update(candidates, p)
+        for row, force in enumerate((unmoved[i]._cohesion_force, unmoved[i]._alignment_force, unmoved[i]._separation_force)):
+            forces[row, i] = force.x, force.y
+    return forces
+
+@pytest.mark.parametrize("mode", ["metric", "topological", "capped"])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_flock_forces_match_boids(mode, seed):
+    p = params.current().changed(NEIGHBOUR_COUNT=7 if mode == "topological" else 0)
+    if mode == "capped":
+        p = p.capped(7)
+    boids = _boids(seed)
+
+    flock = Flock.from_boids(boids)
+    flock.compute_forces(p)
+    expected = _boid_forces(boids, p)
+
+    assert np.allclose(flock.cohesion_forces, expected[0])
+    assert np.allclose(flock.alignment_forces, expected[1])
+    assert np.allclose(flock.separation_forces, expected[2])
+    assert np.abs(expected).sum(axis=(1, 2)).min() > 0 # Every rule was exercised
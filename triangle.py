@@ -2,6 +2,8 @@
 
 import pygame
 import math
+import numpy as np
+from renderer import FlockRenderer
 from settings import RED
 
 class Triangle:
@@ -78,4 +80,104 @@ class Triangle:
             f"Target: {self.current_coord_index + 1}/{len(self.coords)} | "
             f"Rotation: {self.rotation:.1f}° | "
             f"Position: ({int(self.position.x)}, {int(self.position.y)})"
-        )
\ No newline at end of file
+        )
+
+class TriangleFleet:
+    def __init__(self, paths, path_of=None, start_indices=0, speeds=1, size=(20, 30), color=(255, 255, 0),
+                 rotation_speed_alpha=0.1):
+        """
+        Batched engine for many Triangle-style path followers (e.g. leaders or predators).
+        Every path is a closed loop of waypoints; segment directions and cumulative arc
+        lengths are computed once, and each update advances all followers by arc length
+        in a few NumPy operations. Unlike Triangle, the distance left over at a waypoint
+        carries on along the next segment instead of being lost to the snap.
+        :param paths: A list of paths, each a list of (x, y) waypoints.
+        :param path_of: The path index of every follower, defaults to one follower per path.
+        :param start_indices: The waypoint each follower starts at (scalar or per follower).
+        :param speeds: Movement speed in pixels per update (scalar or per follower).
+        :param size: A tuple (width, height) for the triangles.
+        :param color: The color of the triangles.
+        :param rotation_speed_alpha: How quickly the triangles turn towards their heading.
+        """
+        self.path_of = np.arange(len(paths)) if path_of is None else np.asarray(path_of, dtype=int)
+        count = len(self.path_of)
+        self.speeds = np.broadcast_to(np.asarray(speeds, dtype=float), (count,)).copy()
+        self.size = size
+        self.color = color
+        self.rotation_speed_alpha = rotation_speed_alpha
+        self.renderer = FlockRenderer(lod_threshold=float("inf"))
+        self.show_directions = False # Debug direction lines, as Triangle.draw always drew them
+
+        # Every path's segments back to back: waypoint i to waypoint i + 1, closing the loop
+        starts, ends = [], []
+        for path in paths:
+            points = np.asarray(path, dtype=float).reshape(-1, 2)
+            starts.append(points)
+            ends.append(np.roll(points, -1, axis=0))
+        self.segment_starts = np.concatenate(starts)
+        deltas = np.concatenate(ends) - self.segment_starts
+        segment_lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+        self.segment_directions = deltas / np.where(segment_lengths > 0, segment_lengths, 1.0)[:, None]
+        self.segment_angles = np.degrees(np.arctan2(deltas[:, 1], deltas[:, 0]))
+
+        # Arc length at the start of every segment, measured along all paths laid end to end
+        self.segment_arcs = np.concatenate(([0.0], np.cumsum(segment_lengths)[:-1]))
+        self.path_sizes = np.array([len(s) for s in starts])
+        self.path_first_segment = np.concatenate(([0], np.cumsum(self.path_sizes)[:-1]))
+        self.path_last_segment = self.path_first_segment + self.path_sizes - 1
+        self.path_arcs = self.segment_arcs[self.path_first_segment]
+        self.path_lengths = np.add.reduceat(segment_lengths, self.path_first_segment)
+
+        # Follower state: arc length travelled along its own path
+        first = self.path_first_segment[self.path_of]
+        start_indices = np.broadcast_to(np.asarray(start_indices, dtype=int), (count,)) % self.path_sizes[self.path_of]
+        self.arcs = self.segment_arcs[first + start_indices] - self.path_arcs[self.path_of]
+        self.segments = first + start_indices
+        self.positions = self.segment_starts[self.segments].copy()
+        self.rotations = np.zeros(count)
+
+    def __len__(self):
+        return len(self.path_of)
+
+    def update(self):
+        """Advances every follower along its path and turns it towards its segment's heading."""
+        lengths = self.path_lengths[self.path_of]
+        self.arcs = np.where(lengths > 0, np.mod(self.arcs + self.speeds, np.where(lengths > 0, lengths, 1.0)), 0.0)
+
+        # Locate each follower's segment by its arc length along all paths
+        arcs = self.path_arcs[self.path_of] + self.arcs
+        segments = np.searchsorted(self.segment_arcs, arcs, side="right") - 1
+        self.segments = np.clip(segments, self.path_first_segment[self.path_of], self.path_last_segment[self.path_of])
+        offsets = (arcs - self.segment_arcs[self.segments])[:, None]
+        self.positions = self.segment_starts[self.segments] + self.segment_directions[self.segments] * offsets
+
+        # Smoothly rotate towards the target angle
+        angle_difference = (self.segment_angles[self.segments] - self.rotations + 180) % 360 - 180
+        self.rotations += angle_difference * self.rotation_speed_alpha
+
+    def headings(self):
+        """Returns the N x 2 unit vectors the triangles point along."""
+        angles = np.radians(self.rotations)
+        return np.column_stack((np.cos(angles), np.sin(angles)))
+
+    def draw(self, screen):
+        """Draws every triangle in one batch, plus the debug direction lines when show_directions is set."""
+        headings = self.headings()
+        self.renderer.draw(screen, self.positions, headings, self.size, self.color)
+        if self.show_directions:
+            ends = self.positions + headings * self.size[1]
+            for start, end in zip(self.positions.tolist(), ends.tolist()):
+                pygame.draw.line(screen, RED, start, end, 2)
+
+    def get_info(self, index):
+        """Returns a formatted string with one follower's current status."""
+        path = self.path_of[index]
+        waypoints = self.path_sizes[path]
+        # The target is the waypoint at the end of the current segment
+        target = (self.segments[index] - self.path_first_segment[path] + 1) % waypoints
+        x, y = self.positions[index]
+        return (
+            f"Target: {target + 1}/{waypoints} | "
+            f"Rotation: {self.rotations[index]:.1f}° | "
+            f"Position: ({int(x)}, {int(y)})"
+        )
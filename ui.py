@@ -1,15 +1,18 @@
 # ui.py
 
 import pygame
+import params
 from settings import (
     BUTTON_WIDTH, BUTTON_HEIGHT, BUTTON_COLOR, BUTTON_SELECTED_COLOR,
-    BUTTON_TEXT_COLOR, FONT, SCREEN_WIDTH, SCREEN_HEIGHT, FPS_OPTIONS, PARAM_RANGES
+    BUTTON_TEXT_COLOR, FONT, SCREEN_WIDTH, SCREEN_HEIGHT, TICK_RATE_OPTIONS, PARAM_RANGES, SPECIES_PARAM_RANGES
 )
 from slider import Slider # Import the new Slider class
 
 class UIManager:
     def __init__(self, settings_module):
         self.settings = settings_module # Reference to the settings module for dynamic updates
+        # Called with NAME=value when a slider moves; a threaded simulation swaps in its own queue
+        self.publish = params.publish
 
         # UI element dimensions and positioning
         slider_width = 150
@@ -26,23 +29,36 @@ class UIManager:
         slider_y_start = top_margin
         spacing = slider_height + 20 # More spacing for sliders
 
-        self.sliders = []
-        current_y = slider_y_start
-
-        # Create sliders for each parameter in PARAM_RANGES
-        for param_name, props in PARAM_RANGES.items():
-            slider = Slider(
-                slider_x, current_y, slider_width, slider_height,
-                props["min"], props["max"], props["initial"], param_name, props["step"], props["color"]
-            )
-            self.sliders.append(slider)
-            current_y += spacing
+        # With several species, a row of tabs picks whose panel of sliders is shown;
+        # a species' sliders publish its own parameters, e.g. predator.MAX_SPEED
+        p = params.current()
+        self.tabs = []
+        self.panels = []
+        if p.species:
+            for i, (name, _) in enumerate(p.species):
+                self.tabs.append((name, pygame.Rect(slider_x + i * (BUTTON_WIDTH + 10), slider_y_start, BUTTON_WIDTH, BUTTON_HEIGHT)))
+            slider_y_start += BUTTON_HEIGHT + 20
+        for name, snapshot in p.species or [(None, p)]:
+            values = snapshot.as_settings()
+            current_y = slider_y_start
+            sliders = []
+            # Create sliders for each parameter in PARAM_RANGES (plus the species rules' weights)
+            for param_name, props in (SPECIES_PARAM_RANGES if name else PARAM_RANGES).items():
+                slider = Slider(
+                    slider_x, current_y, slider_width, slider_height,
+                    props["min"], props["max"], values[param_name], param_name, props["step"], props["color"]
+                )
+                sliders.append(slider)
+                current_y += spacing
+            self.panels.append((f"{name}." if name else "", sliders))
+        self.panel = 0
+        self.sliders = self.panels[0][1]
 
         # Buttons in bottom-right corner
         button_x = SCREEN_WIDTH - BUTTON_WIDTH - right_margin
         # Calculate button_y_start to place buttons at the bottom, stacking upwards
         # Determine the number of buttons to calculate the total height needed
-        num_buttons = len(FPS_OPTIONS) + 2 # 4 speed buttons + play/pause + reset
+        num_buttons = len(TICK_RATE_OPTIONS) + 2 # 4 speed buttons + play/pause + reset
         total_buttons_height = (BUTTON_HEIGHT * num_buttons) + (spacing * (num_buttons))
         # button_y_start = SCREEN_HEIGHT - total_buttons_height - bottom_margin 
         button_y_start = SCREEN_HEIGHT - total_buttons_height - bottom_margin + 180
@@ -59,35 +75,46 @@ class UIManager:
     def handle_event(self, event):
         """
         Checks for button clicks and slider interactions, returning actions to perform.
-        Returns a tuple (action_type, value) e.g., ('set_fps', 30), ('toggle_pause', None),
+        Returns a tuple (action_type, value) e.g., ('set_tick_rate', 30), ('toggle_pause', None),
         or ('update_param', {'name': 'PERCEPTION_RADIUS', 'value': 100})
         """
+        # Handle species tabs
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            for i, (name, rect) in enumerate(self.tabs):
+                if rect.collidepoint(event.pos):
+                    self.panel = i
+                    self.sliders = self.panels[i][1]
+                    return 'select_species', name
+
         # Handle slider events
+        prefix = self.panels[self.panel][0]
         for i, slider in enumerate(self.sliders):
             if slider.handle_event(event):
-                # Update the corresponding setting directly
-                setattr(self.settings, slider.label, slider.value)
-                return 'update_param', {'name': slider.label, 'value': slider.value}
+                # Publish a new parameter snapshot; the simulation picks it up on its next tick
+                self.publish(**{prefix + slider.label: slider.value})
+                return 'update_param', {'name': prefix + slider.label, 'value': slider.value}
 
         # Handle button events
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.buttons["play_pause"]["rect"].collidepoint(event.pos):
                 return 'toggle_pause', None
             if self.buttons["slow"]["rect"].collidepoint(event.pos):
-                return 'set_fps', FPS_OPTIONS["slow"]
+                return 'set_tick_rate', TICK_RATE_OPTIONS["slow"]
             if self.buttons["fast"]["rect"].collidepoint(event.pos):
-                return 'set_fps', FPS_OPTIONS["fast"]
+                return 'set_tick_rate', TICK_RATE_OPTIONS["fast"]
             if self.buttons["very_fast"]["rect"].collidepoint(event.pos):
-                return 'set_fps', FPS_OPTIONS["very_fast"]
+                return 'set_tick_rate', TICK_RATE_OPTIONS["very_fast"]
             if self.buttons["extremely_fast"]["rect"].collidepoint(event.pos):
-                return 'set_fps', FPS_OPTIONS["extremely_fast"]
+                return 'set_tick_rate', TICK_RATE_OPTIONS["extremely_fast"]
             if self.buttons["reset"]["rect"].collidepoint(event.pos):
                 return 'reset', None
         return None, None
 
-    def draw(self, screen, paused, current_fps):
+    def draw(self, screen, paused, current_tick_rate):
         """Draws all UI elements."""
-        # Draw sliders
+        # Draw the species tabs and the selected panel's sliders
+        for i, (name, rect) in enumerate(self.tabs):
+            self._draw_button(screen, rect, BUTTON_SELECTED_COLOR if i == self.panel else BUTTON_COLOR, name)
         for slider in self.sliders:
             slider.draw(screen)
 
@@ -98,13 +125,13 @@ class UIManager:
         
         # Draw speed buttons
         self._draw_button(screen, self.buttons["slow"]["rect"], 
-                          BUTTON_SELECTED_COLOR if current_fps == FPS_OPTIONS["slow"] and not paused else BUTTON_COLOR, "Slow")
+                          BUTTON_SELECTED_COLOR if current_tick_rate == TICK_RATE_OPTIONS["slow"] and not paused else BUTTON_COLOR, "Slow")
         self._draw_button(screen, self.buttons["fast"]["rect"], 
-                          BUTTON_SELECTED_COLOR if current_fps == FPS_OPTIONS["fast"] and not paused else BUTTON_COLOR, "Fast")
+                          BUTTON_SELECTED_COLOR if current_tick_rate == TICK_RATE_OPTIONS["fast"] and not paused else BUTTON_COLOR, "Fast")
         self._draw_button(screen, self.buttons["very_fast"]["rect"], 
-                          BUTTON_SELECTED_COLOR if current_fps == FPS_OPTIONS["very_fast"] and not paused else BUTTON_COLOR, "V. Fast")
+                          BUTTON_SELECTED_COLOR if current_tick_rate == TICK_RATE_OPTIONS["very_fast"] and not paused else BUTTON_COLOR, "V. Fast")
         self._draw_button(screen, self.buttons["extremely_fast"]["rect"], 
-                          BUTTON_SELECTED_COLOR if current_fps == FPS_OPTIONS["extremely_fast"] and not paused else BUTTON_COLOR, "E. Fast")
+                          BUTTON_SELECTED_COLOR if current_tick_rate == TICK_RATE_OPTIONS["extremely_fast"] and not paused else BUTTON_COLOR, "E. Fast")
         
         # Draw Reset button
         self._draw_button(screen, self.buttons["reset"]["rect"], BUTTON_COLOR, "Reset")